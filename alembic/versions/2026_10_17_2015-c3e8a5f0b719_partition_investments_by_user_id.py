@@ -0,0 +1,134 @@
+"""partition investments by user_id
+
+Optional: converts investments into a PostgreSQL table hash-partitioned on
+user_id only when run with
+
+    alembic -x partition_investments=true upgrade head
+
+(`-x investments_partitions=N` sets the number of partitions, 16 by
+default). Otherwise, and on other databases, the upgrade does nothing; the
+downgrade only runs when the table is partitioned.
+
+A primary key of a partitioned table must contain the partition key, and
+user_id is nullable, so each partition gets its own primary key on id (ids
+still come from the one sequence). Nothing can reference investments.id
+any more, so the lots foreign key is dropped; lots are rebuilt whenever
+their position is, which already removes the lots of a deleted
+transaction.
+
+Revision ID: c3e8a5f0b719
+Revises: 9a4f7c2e16d8
+Create Date: 2026-10-17 20:15:42.390178
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3e8a5f0b719'
+down_revision: Union[str, None] = '9a4f7c2e16d8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+DEFAULT_PARTITIONS = 16
+
+# (name, columns, INCLUDE columns) of the investments indexes
+INDEXES = [
+    ('ix_investments_investment_type', ['investment_type'], []),
+    ('ix_investments_purchase_date', ['purchase_date'], []),
+    ('ix_investments_user_date_id', ['user_id', 'purchase_date', 'id'], []),
+    ('ix_investments_user_symbol_date_id', ['user_id', 'symbol', 'purchase_date', 'id'], ['name', 'investment_type', 'amount', 'purchase_price']),
+    ('ix_investments_symbol_id', ['symbol', 'id'], ['user_id', 'name', 'investment_type', 'amount', 'purchase_price']),
+]
+
+
+def partitioning_requested() -> bool:
+    return context.get_x_argument(as_dictionary=True).get('partition_investments', '').lower() == 'true'
+
+
+def is_partitioned() -> bool:
+    return op.get_bind().execute(sa.text(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = 'investments'::regclass)"
+    )).scalar()
+
+
+def should_run(partitioned: bool) -> bool:
+    """Check whether investments is in the state this step converts from.
+
+    With --sql there is no database to look at, and the -x option alone
+    decides; otherwise the table itself is checked.
+    """
+    if op.get_context().dialect.name != 'postgresql':
+        return False
+    if context.is_offline_mode():
+        return partitioning_requested()
+    return is_partitioned() == partitioned
+
+
+def drop_indexes() -> None:
+    for name, _, _ in INDEXES:
+        op.drop_index(name, table_name='investments')
+
+
+def create_indexes() -> None:
+    # On a partitioned table each index is created on every partition
+    for name, columns, include in INDEXES:
+        op.create_index(name, 'investments', columns, unique=False, postgresql_include=include)
+
+
+def upgrade() -> None:
+    if not partitioning_requested() or not should_run(partitioned=False):
+        return
+
+    partitions = int(context.get_x_argument(as_dictionary=True).get('investments_partitions', DEFAULT_PARTITIONS))
+
+    op.drop_constraint('lots_investment_id_fkey', 'lots', type_='foreignkey')
+    drop_indexes()
+    op.rename_table('investments', 'investments_unpartitioned')
+
+    op.execute(
+        "CREATE TABLE investments "
+        "(LIKE investments_unpartitioned INCLUDING DEFAULTS INCLUDING CONSTRAINTS) "
+        "PARTITION BY HASH (user_id)"
+    )
+    for remainder in range(partitions):
+        op.execute(
+            f"CREATE TABLE investments_p{remainder} PARTITION OF investments "
+            f"FOR VALUES WITH (MODULUS {partitions}, REMAINDER {remainder})"
+        )
+        op.create_primary_key(f'investments_p{remainder}_pkey', f'investments_p{remainder}', ['id'])
+
+    op.execute("INSERT INTO investments SELECT * FROM investments_unpartitioned")
+    # Keep the id sequence when the old table is dropped
+    op.execute("ALTER SEQUENCE investments_id_seq OWNED BY investments.id")
+    op.drop_table('investments_unpartitioned')
+
+    create_indexes()
+    op.execute("ANALYZE investments")
+
+
+def downgrade() -> None:
+    if not should_run(partitioned=True):
+        return
+
+    drop_indexes()
+    op.rename_table('investments', 'investments_partitioned')
+
+    op.execute(
+        "CREATE TABLE investments "
+        "(LIKE investments_partitioned INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+    )
+    op.create_primary_key('investments_pkey', 'investments', ['id'])
+    op.execute("INSERT INTO investments SELECT * FROM investments_partitioned")
+    op.execute("ALTER SEQUENCE investments_id_seq OWNED BY investments.id")
+    # Drops the partitions with it
+    op.drop_table('investments_partitioned')
+
+    create_indexes()
+    op.create_foreign_key(
+        'lots_investment_id_fkey', 'lots', 'investments', ['investment_id'], ['id'], ondelete='CASCADE'
+    )
+    op.execute("ANALYZE investments")
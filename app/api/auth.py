@@ -4,7 +4,8 @@ from datetime import datetime, timedelta
 from typing import Optional
 
 from fastapi import APIRouter, Depends, HTTPException, status, Header
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from jose import JWTError, jwt
 
 from app.database import get_db
@@ -53,9 +54,9 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
 
 
 @router.post("/telegram", response_model=AuthResponse)
-def authenticate_telegram(
+async def authenticate_telegram(
     auth_data: TelegramAuthData,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Authenticate user via Telegram."""
     # Get bot token from settings
@@ -70,7 +71,7 @@ def authenticate_telegram(
             )
     
     # Find or create user
-    user = db.query(User).filter(User.telegram_id == auth_data.id).first()
+    user = await db.scalar(select(User).where(User.telegram_id == auth_data.id))
     
     if not user:
         user = User(
@@ -90,8 +91,8 @@ def authenticate_telegram(
         user.photo_url = auth_data.photo_url
         user.last_login = datetime.now()
     
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
     
     # Create access token
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -107,9 +108,9 @@ def authenticate_telegram(
 
 
 @router.get("/me", response_model=UserResponse)
-def get_current_user(
+async def get_current_user(
     token: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get current user info from token."""
     try:
@@ -126,7 +127,7 @@ def get_current_user(
             detail="Could not validate credentials"
         )
     
-    user = db.query(User).filter(User.telegram_id == telegram_id).first()
+    user = await db.scalar(select(User).where(User.telegram_id == telegram_id))
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -137,9 +138,9 @@ def get_current_user(
 
 
 @router.get("/verify")
-def verify_token(
+async def verify_token(
     authorization: str = Header(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Verify login token from Authorization header."""
     if not authorization:
@@ -163,7 +164,7 @@ def verify_token(
         )
     
     # Find token in database
-    login_token = db.query(LoginToken).filter(LoginToken.token == token).first()
+    login_token = await db.scalar(select(LoginToken).where(LoginToken.token == token))
     
     if not login_token:
         raise HTTPException(
@@ -188,10 +189,10 @@ def verify_token(
     # Mark token as used
     login_token.is_used = True
     login_token.used_at = datetime.now()
-    db.commit()
+    await db.commit()
     
     # Get user
-    user = db.query(User).filter(User.id == login_token.user_id).first()
+    user = await db.get(User, login_token.user_id)
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
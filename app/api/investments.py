@@ -1,302 +1,330 @@
 from typing import List, Optional
 from datetime import date, datetime
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import func, extract, case
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy import select, func, tuple_
 
-from app.database import get_db
+from app.database import get_db, get_read_db, get_read_sessionmaker
 from app.models.investment import Investment, InvestmentType
+from app.models.position import Position
+from app.models.price import Price
 from app.schemas.investment import (
     InvestmentCreate, 
     InvestmentUpdate, 
     InvestmentResponse,
     InvestmentSell,
-    AvailablePosition
+    AvailablePosition,
+    DashboardData,
+    ReturnsData,
+    ImportResult,
+    BulkPriceUpdate,
+    BulkPriceResult
 )
+from app.services.cache import analytics_cache
+from app.services.derived import (
+    TransactionKey,
+    on_investment_created,
+    on_investment_deleted,
+    on_investment_updated,
+    on_investments_imported,
+    on_prices_updated
+)
+from app.services.exporter import EXPORT_FORMATS, stream_export
+from app.services.importer import (
+    IMPORT_FORMATS,
+    MAX_REPORTED_ERRORS,
+    insert_batch,
+    iter_records,
+    validate_record
+)
+from app.services.kernel import build_earnings_series
+from app.services.locks import position_lock
+from app.services.lots import LOT_METHODS
+from app.services.pagination import decode_cursor, encode_cursor
+from app.services.portfolio import collect_positions, summarize_positions
+from app.services.positions import aggregate_ledger, load_positions, lock_positions
+from app.services.prices import load_price_history
+from app.services.returns import build_cash_flow_series, compute_returns
+from app.services.snapshots import read_earnings_series
 
 router = APIRouter()
 
+# Response fields of an investment, in schema order
+INVESTMENT_RESPONSE_FIELDS = tuple(InvestmentResponse.model_fields)
+
 
+# Returns an ORJSONResponse, which FastAPI sends as is: response_model only
+# documents the schema in OpenAPI and does not validate rows built by `_investment_rows`
 @router.get("/", response_model=List[InvestmentResponse])
-def get_investments(
+async def get_investments(
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     user_id: Optional[int] = None,
     investment_type: Optional[InvestmentType] = None,
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
-    """Get all investments with optional filtering."""
-    query = db.query(Investment)
+    """Get all investments with optional filtering.
+    
+    Pages are ordered by (purchase_date, id), newest first. A full page sets the
+    `X-Next-Cursor` header; passing it back as `cursor` continues right after
+    the last row (keyset pagination) and ignores `skip`.
+    Rows are serialized directly, without validating each one.
+    """
+    query = select(Investment)
     
     if user_id:
-        query = query.filter(Investment.user_id == user_id)
+        query = query.where(Investment.user_id == user_id)
     if investment_type:
-        query = query.filter(Investment.investment_type == investment_type)
+        query = query.where(Investment.investment_type == investment_type)
     if start_date:
-        query = query.filter(Investment.purchase_date >= start_date)
+        query = query.where(Investment.purchase_date >= start_date)
     if end_date:
-        query = query.filter(Investment.purchase_date <= end_date)
-    
-    investments = query.order_by(Investment.purchase_date.desc()).offset(skip).limit(limit).all()
-    return investments
+        query = query.where(Investment.purchase_date <= end_date)
+    
+    query = query.order_by(Investment.purchase_date.desc(), Investment.id.desc())
+    
+    if cursor:
+        try:
+            after = decode_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+        query = query.where(tuple_(Investment.purchase_date, Investment.id) < after)
+    else:
+        query = query.offset(skip)
+    
+    investments = (await db.scalars(query.limit(limit))).all()
+    headers = {}
+    
+    if investments and len(investments) == limit:
+        last = investments[-1]
+        headers["X-Next-Cursor"] = encode_cursor(last.purchase_date, last.id)
+    
+    return ORJSONResponse(_investment_rows(investments), headers=headers)
 
 
 @router.get("/analytics/overview")
-def get_portfolio_overview(
+async def get_portfolio_overview(
     user_id: Optional[int] = None,
     investment_type: Optional[InvestmentType] = None,
-    db: Session = Depends(get_db)
+    cost_basis_method: str = Query("avg", regex="^(avg|fifo|lifo)$"),
+    db: AsyncSession = Depends(get_read_db),
+    primary_db: AsyncSession = Depends(get_db)
 ):
     """Get portfolio overview with summary statistics.
     
     Calculates both unrealized profit (current holdings) and realized profit (from sales).
     Shows comprehensive portfolio performance including completed transactions.
+    Sells are matched against the average cost, or against lots in FIFO or LIFO order.
     """
-    # Build base query with filters
-    query = db.query(Investment)
-    
-    if user_id:
-        query = query.filter(Investment.user_id == user_id)
-    if investment_type:
-        query = query.filter(Investment.investment_type == investment_type)
-    
-    investments = query.all()
-    
-    # Group by symbol to calculate positions and realized P/L
-    positions = {}
-    
-    for inv in investments:
-        if inv.symbol not in positions:
-            positions[inv.symbol] = {
-                "investment_type": inv.investment_type,
-                "bought_amount": 0,
-                "sold_amount": 0,
-                "total_bought_value": 0,
-                "total_sold_value": 0,
-                "current_price": inv.current_price
-            }
+    async def compute(from_primary: bool):
+        session = primary_db if from_primary else db
+        if user_id:
+            # One ledger row per position
+            positions = await session.run_sync(load_positions, user_id, investment_type, cost_basis_method)
+        else:
+            # Every user's ledger rows, summed per symbol in SQL
+            positions = await session.run_sync(aggregate_ledger, cost_basis_method, investment_type)
         
-        if inv.amount > 0:  # Buy transaction
-            positions[inv.symbol]["bought_amount"] += inv.amount
-            positions[inv.symbol]["total_bought_value"] += inv.amount * inv.purchase_price
-        else:  # Sell transaction (negative amount)
-            positions[inv.symbol]["sold_amount"] += abs(inv.amount)
-            positions[inv.symbol]["total_sold_value"] += abs(inv.amount) * inv.purchase_price
-        
-        # Update current price if available
-        if inv.current_price:
-            positions[inv.symbol]["current_price"] = inv.current_price
-    
-    # Calculate totals
-    total_invested = 0
-    total_current_value = 0
-    unrealized_profit_loss = 0
-    realized_profit_loss = 0
-    active_positions = 0
-    by_type = {}
-    
-    for symbol, pos in positions.items():
-        bought_amount = pos["bought_amount"]
-        sold_amount = pos["sold_amount"]
-        net_amount = bought_amount - sold_amount
-        
-        # Calculate average purchase price
-        avg_purchase_price = pos["total_bought_value"] / bought_amount if bought_amount > 0 else 0
-        
-        # Calculate realized P/L from sales
-        if sold_amount > 0:
-            cost_of_sold = avg_purchase_price * sold_amount
-            realized_profit_loss += pos["total_sold_value"] - cost_of_sold
-        
-        # Calculate unrealized P/L for remaining position
-        if net_amount > 0:
-            position_cost = avg_purchase_price * net_amount
-            current_price = pos["current_price"] or avg_purchase_price
-            position_current_value = current_price * net_amount
-            position_unrealized_pl = position_current_value - position_cost
-            
-            total_invested += position_cost
-            total_current_value += position_current_value
-            unrealized_profit_loss += position_unrealized_pl
-            active_positions += 1
-            
-            # Group by type
-            type_key = pos["investment_type"].value
-            if type_key not in by_type:
-                by_type[type_key] = {
-                    "count": 0,
-                    "invested": 0,
-                    "current_value": 0,
-                    "profit_loss": 0
-                }
-            
-            by_type[type_key]["count"] += 1
-            by_type[type_key]["invested"] += position_cost
-            by_type[type_key]["current_value"] += position_current_value
-            by_type[type_key]["profit_loss"] += position_unrealized_pl
+        return summarize_positions(positions)
     
-    total_profit_loss = unrealized_profit_loss + realized_profit_loss
-    profit_loss_percentage = (total_profit_loss / total_invested * 100) if total_invested > 0 else 0
-    
-    return {
-        "total_investments": active_positions,
-        "total_invested": round(total_invested, 2),
-        "total_current_value": round(total_current_value, 2),
-        "unrealized_profit_loss": round(unrealized_profit_loss, 2),
-        "realized_profit_loss": round(realized_profit_loss, 2),
-        "total_profit_loss": round(total_profit_loss, 2),
-        "profit_loss_percentage": round(profit_loss_percentage, 2),
-        "by_type": by_type
+    params = {
+        "investment_type": investment_type,
+        "cost_basis_method": cost_basis_method
     }
+    return await analytics_cache.get_or_compute("overview", user_id, params, compute)
 
 
 @router.get("/analytics/earnings")
-def get_earnings_analysis(
+async def get_earnings_analysis(
     user_id: Optional[int] = None,
     investment_type: Optional[InvestmentType] = None,
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
     aggregate_by: str = Query("month", regex="^(day|week|month|year)$"),
-    db: Session = Depends(get_db)
+    fill: bool = False,
+    db: AsyncSession = Depends(get_read_db),
+    primary_db: AsyncSession = Depends(get_db)
 ):
     """Get cumulative earnings analysis with time-based aggregation.
     
     Shows portfolio value over time considering buys (positive amount) and sells (negative amount).
     Each point represents the total value of all net positions up to that period.
+    A single user's series is rolled up from the daily snapshots.
+    With `fill`, every period between the start and end date (today by
+    default) gets a point, carrying the positions forward through periods
+    without activity.
     """
-    # Build base query with filters
-    query = db.query(Investment)
+    async def compute(from_primary: bool):
+        session = primary_db if from_primary else db
+        if user_id:
+            return await session.run_sync(
+                read_earnings_series, user_id, investment_type, aggregate_by, start_date, end_date, fill
+            )
+        else:
+            # Snapshots are kept per user, so the all-users view replays the transactions
+            query = select(Investment)
+            
+            if investment_type:
+                query = query.where(Investment.investment_type == investment_type)
+            
+            # Transactions must be replayed in chronological order
+            investments = (await session.scalars(query.order_by(Investment.purchase_date, Investment.id))).all()
+            prices = await session.run_sync(load_price_history, {inv.symbol for inv in investments})
+            
+            return build_earnings_series(investments, aggregate_by, start_date, end_date, prices, fill)
+    
+    params = {
+        "investment_type": investment_type,
+        "start_date": start_date,
+        "end_date": end_date,
+        "aggregate_by": aggregate_by,
+        "fill": fill
+    }
+    # The points are plain JSON values, so they are serialized as they are
+    return ORJSONResponse(await analytics_cache.get_or_compute("earnings", user_id, params, compute))
+
+
+@router.get("/analytics/returns", response_model=ReturnsData)
+async def get_returns(
+    user_id: Optional[int] = None,
+    investment_type: Optional[InvestmentType] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    db: AsyncSession = Depends(get_read_db),
+    primary_db: AsyncSession = Depends(get_db)
+):
+    """Get time-weighted (TWR) and money-weighted (XIRR) returns over a date range.
     
-    if user_id:
-        query = query.filter(Investment.user_id == user_id)
-    if investment_type:
-        query = query.filter(Investment.investment_type == investment_type)
-    
-    # Get all investments sorted by purchase date
-    investments = query.order_by(Investment.purchase_date).all()
-    
-    if not investments:
-        return []
-    
-    # Helper function to get period key
-    def get_period_key(purchase_date, aggregate_by):
-        if aggregate_by == "day":
-            return purchase_date.isoformat()
-        elif aggregate_by == "week":
-            year, week, _ = purchase_date.isocalendar()
-            return f"{year}-W{week:02d}"
-        elif aggregate_by == "month":
-            return purchase_date.strftime("%Y-%m")
-        else:  # year
-            return str(purchase_date.year)
-    
-    # Group investments by their purchase period
-    investments_by_period = {}
-    for inv in investments:
-        key = get_period_key(inv.purchase_date, aggregate_by)
-        if key not in investments_by_period:
-            investments_by_period[key] = []
-        investments_by_period[key].append(inv)
-    
-    # Sort period keys
-    sorted_periods = sorted(investments_by_period.keys())
-    
-    # Apply date range filter to display periods if specified
-    if start_date:
-        start_key = get_period_key(start_date, aggregate_by)
-        sorted_periods = [p for p in sorted_periods if p >= start_key]
-    if end_date:
-        end_key = get_period_key(end_date, aggregate_by)
-        sorted_periods = [p for p in sorted_periods if p <= end_key]
-    
-    # Track positions by symbol: {symbol: {net_amount, total_bought_value, current_price}}
-    positions = {}
-    
-    # Process all transactions before start_date
-    if start_date and sorted_periods:
-        for period_key in sorted(investments_by_period.keys()):
-            if period_key < sorted_periods[0]:
-                for inv in investments_by_period[period_key]:
-                    if inv.symbol not in positions:
-                        positions[inv.symbol] = {
-                            "net_amount": 0,
-                            "total_bought_value": 0,
-                            "current_price": inv.current_price
-                        }
-                    
-                    positions[inv.symbol]["net_amount"] += inv.amount
-                    if inv.amount > 0:  # Only count buys for cost basis
-                        positions[inv.symbol]["total_bought_value"] += inv.amount * inv.purchase_price
-                    
-                    if inv.current_price:
-                        positions[inv.symbol]["current_price"] = inv.current_price
-    
-    # Build cumulative data for each period
-    result = []
-    
-    for period_key in sorted_periods:
-        # Process transactions in this period
-        if period_key in investments_by_period:
-            for inv in investments_by_period[period_key]:
-                if inv.symbol not in positions:
-                    positions[inv.symbol] = {
-                        "net_amount": 0,
-                        "total_bought_value": 0,
-                        "current_price": inv.current_price
-                    }
-                
-                positions[inv.symbol]["net_amount"] += inv.amount
-                if inv.amount > 0:  # Only count buys for cost basis
-                    positions[inv.symbol]["total_bought_value"] += inv.amount * inv.purchase_price
-                
-                if inv.current_price:
-                    positions[inv.symbol]["current_price"] = inv.current_price
-        
-        # Calculate cumulative totals based on current net positions
-        cumulative_invested = 0
-        cumulative_current_value = 0
-        cumulative_count = 0
-        total_amount = 0  # Total quantity of all investments
+    Both are computed from the transaction cash flows and the daily value of the holdings.
+    The cash-flow series of the whole history is cached per user and investment type,
+    so another date range is computed from it without reading the database again.
+    """
+    async def load_series(from_primary: bool):
+        session = primary_db if from_primary else db
+        query = select(Investment)
         
-        for symbol, pos in positions.items():
-            net_amount = pos["net_amount"]
-            
-            if net_amount > 0:  # Only count active positions
-                # Calculate proportional cost basis for remaining position
-                avg_purchase_price = pos["total_bought_value"] / net_amount if net_amount > 0 else 0
-                position_invested = avg_purchase_price * net_amount
-                
-                current_price = pos["current_price"] or avg_purchase_price
-                position_current_value = current_price * net_amount
-                
-                cumulative_invested += position_invested
-                cumulative_current_value += position_current_value
-                cumulative_count += 1
-                total_amount += net_amount  # Add net amount to total
+        if user_id:
+            query = query.where(Investment.user_id == user_id)
+        if investment_type:
+            query = query.where(Investment.investment_type == investment_type)
         
-        profit_loss = cumulative_current_value - cumulative_invested
+        investments = (await session.scalars(query.order_by(Investment.purchase_date, Investment.id))).all()
+        prices = await session.run_sync(load_price_history, {inv.symbol for inv in investments})
         
-        result.append({
-            "date": period_key,
-            "invested": round(cumulative_invested, 2),
-            "current_value": round(cumulative_current_value, 2),
-            "profit_loss": round(profit_loss, 2),
-            "count": cumulative_count,
-            "total_amount": round(total_amount, 6)  # Total quantity with precision
-        })
+        return build_cash_flow_series(investments, prices)
     
-    return result
+    series = await analytics_cache.get_or_compute(
+        "cash-flows", user_id, {"investment_type": investment_type}, load_series
+    )
+    return compute_returns(series, start_date, end_date)
 
 
-@router.get("/{investment_id}", response_model=InvestmentResponse)
-def get_investment(
-    investment_id: int,
-    db: Session = Depends(get_db)
+@router.get("/analytics/cache-stats")
+async def get_cache_stats():
+    """Get hit and miss counters of the analytics cache in this process."""
+    return analytics_cache.stats()
+
+
+# Also an ORJSONResponse, response_model only documents the schema
+@router.get("/analytics/dashboard", response_model=DashboardData)
+async def get_dashboard(
+    user_id: Optional[int] = None,
+    investment_type: Optional[InvestmentType] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    aggregate_by: str = Query("month", regex="^(day|week|month|year)$"),
+    fill: bool = False,
+    recent_limit: int = Query(10, ge=0, le=100),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Get everything the dashboard shows in one response.
+    
+    Loads the transactions (with current prices) and their price history once,
+    and computes the overview, the earnings series, the available positions
+    and the latest transactions from that single pass.
+    Each part matches its standalone endpoint; the date range applies to the
+    earnings series and the latest transactions.
+    """
+    query = select(Investment, Price.price).outerjoin(Price, Price.symbol == Investment.symbol)
+    
+    if user_id:
+        query = query.where(Investment.user_id == user_id)
+    if investment_type:
+        query = query.where(Investment.investment_type == investment_type)
+    
+    # Chronological order feeds the earnings replay; the newest come last
+    rows = (await db.execute(query.order_by(Investment.purchase_date, Investment.id))).all()
+    investments = [inv for inv, _ in rows]
+    positions = collect_positions(investments, {inv.symbol: price for inv, price in rows if price is not None})
+    prices = await db.run_sync(load_price_history, positions.keys())
+    
+    available_positions = [
+        _build_available_position(
+            symbol=symbol,
+            name=pos["name"],
+            investment_type=pos["investment_type"],
+            net_amount=pos["bought_amount"] - pos["sold_amount"],
+            total_invested=pos["total_bought_value"] - pos["total_sold_value"],
+            current_price=pos["current_price"]
+        )
+        for symbol, pos in sorted(positions.items())
+        if pos["bought_amount"] - pos["sold_amount"] > 0
+    ]
+    
+    recent_investments = [
+        inv for inv in reversed(investments)
+        if (not start_date or inv.purchase_date >= start_date)
+        and (not end_date or inv.purchase_date <= end_date)
+    ][:recent_limit]
+    
+    return ORJSONResponse({
+        "overview": summarize_positions(positions),
+        "earnings": build_earnings_series(investments, aggregate_by, start_date, end_date, prices, fill),
+        "available_positions": available_positions,
+        "recent_investments": _investment_rows(recent_investments)
+    })
+
+
+@router.get("/export")
+async def export_investments(
+    format: str = Query("csv", regex="^(csv|ndjson)$"),
+    user_id: Optional[int] = None,
+    investment_type: Optional[InvestmentType] = None,
+    session_factory: async_sessionmaker = Depends(get_read_sessionmaker)
 ):
-    """Get investment by ID."""
-    investment = db.query(Investment).filter(Investment.id == investment_id).first()
+    """Export the full transaction history as a CSV or NDJSON stream.
+    
+    Rows are streamed from a server-side cursor in chronological order, so the
+    response starts right away and memory stays flat for any history size.
+    """
+    return StreamingResponse(
+        stream_export(session_factory, format, user_id, investment_type),
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="investments.{format}"'}
+    )
+
+
+async def _get_investment(db: AsyncSession, investment_id: int, user_id: Optional[int]) -> Investment:
+    """Load an investment by ID, or raise 404.
+    
+    With `user_id` the lookup also filters on the owner, so on a table
+    partitioned by user_id only that user's partition is searched.
+    """
+    if user_id is None:
+        investment = await db.get(Investment, investment_id)
+    else:
+        investment = await db.scalar(select(Investment).where(
+            Investment.user_id == user_id,
+            Investment.id == investment_id
+        ))
+    
     if not investment:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -305,178 +333,314 @@ def get_investment(
     return investment
 
 
+@router.get("/{investment_id}", response_model=InvestmentResponse)
+async def get_investment(
+    investment_id: int,
+    user_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_db)
+):
+    """Get investment by ID, optionally only among a user's investments."""
+    return await _get_investment(db, investment_id, user_id)
+
+
 @router.post("/", response_model=InvestmentResponse, status_code=status.HTTP_201_CREATED)
-def create_investment(
+async def create_investment(
     investment: InvestmentCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Create new investment."""
     db_investment = Investment(**investment.model_dump())
     db.add(db_investment)
-    db.commit()
-    db.refresh(db_investment)
+    await db.run_sync(lambda session: on_investment_created(session, db_investment))
+    await db.commit()
+    await analytics_cache.invalidate(db_investment.user_id)
+    if db_investment.current_price:
+        await analytics_cache.invalidate_prices()
+    await db.refresh(db_investment)
     return db_investment
 
 
+@router.post("/import", response_model=ImportResult)
+async def import_investments(
+    request: Request,
+    format: Optional[str] = Query(None, regex="^(csv|ndjson)$"),
+    user_id: Optional[int] = None,
+    chunk_size: int = Query(1000, ge=1, le=10000),
+    db: AsyncSession = Depends(get_db)
+):
+    """Import transactions from a CSV or NDJSON request body.
+    
+    The body is read as a stream and validated in chunks of `chunk_size` rows,
+    each inserted with a single statement (COPY on Postgres). Invalid rows are
+    reported by line number and skipped; all valid rows commit together.
+    The format comes from `format` or the Content-Type header, and `user_id`
+    is applied to every row when given.
+    """
+    if format is None:
+        content_type = request.headers.get("content-type", "").split(";")[0].strip()
+        format = {
+            "text/csv": "csv",
+            "application/x-ndjson": "ndjson",
+            "application/jsonl": "ndjson"
+        }.get(content_type)
+    
+    if format not in IMPORT_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Import body must be CSV (text/csv) or NDJSON (application/x-ndjson)"
+        )
+    
+    imported = []
+    closes = {}
+    errors = []
+    failed = 0
+    chunk = []
+    
+    async for line, record in iter_records(request.stream(), format):
+        investment, row_errors = validate_record(record, user_id)
+        if row_errors:
+            failed += 1
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.append({"line": line, "errors": row_errors})
+            continue
+        
+        chunk.append(investment)
+        if investment.current_price:
+            closes[investment.symbol, investment.purchase_date] = investment.current_price
+        if len(chunk) >= chunk_size:
+            await insert_batch(db, chunk)
+            imported.extend(map(TransactionKey.of, chunk))
+            chunk = []
+    
+    await insert_batch(db, chunk)
+    imported.extend(map(TransactionKey.of, chunk))
+    
+    await db.run_sync(on_investments_imported, imported, closes)
+    await db.commit()
+    await analytics_cache.invalidate(*{key.user_id for key in imported})
+    if closes:
+        await analytics_cache.invalidate_prices()
+    
+    return {"imported": len(imported), "failed": failed, "errors": errors}
+
+
+@router.post("/prices/bulk", response_model=BulkPriceResult)
+async def update_prices_bulk(
+    price_update: BulkPriceUpdate,
+    db: AsyncSession = Depends(get_db)
+):
+    """Set the current price of many symbols at once.
+    
+    All quotes are written with a single upsert into the prices table and
+    recorded as today's closes, in one transaction; transactions themselves
+    are not touched. When a symbol is quoted more than once the last quote wins.
+    """
+    prices = {quote.symbol: quote.price for quote in price_update.prices}
+    
+    changed = await db.run_sync(on_prices_updated, prices, date.today())
+    await db.commit()
+    if changed:
+        await analytics_cache.invalidate_prices()
+    
+    return {"symbols": len(prices), "changed": changed}
+
+
 @router.put("/{investment_id}", response_model=InvestmentResponse)
-def update_investment(
+async def update_investment(
     investment_id: int,
     investment_update: InvestmentUpdate,
-    db: Session = Depends(get_db)
+    user_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_db)
 ):
-    """Update investment."""
-    investment = db.query(Investment).filter(Investment.id == investment_id).first()
-    if not investment:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Investment with id {investment_id} not found"
-        )
+    """Update investment, optionally only among a user's investments."""
+    investment = await _get_investment(db, investment_id, user_id)
     
     # Update only provided fields
     update_data = investment_update.model_dump(exclude_unset=True)
+    previous = TransactionKey.of(investment)
     
     for field, value in update_data.items():
         setattr(investment, field, value)
     
-    db.commit()
-    db.refresh(investment)
+    await db.run_sync(lambda session: on_investment_updated(session, investment, previous))
+    await db.commit()
+    await analytics_cache.invalidate(previous.user_id, investment.user_id)
+    if update_data.keys() & {"current_price", "symbol", "purchase_date"}:
+        await analytics_cache.invalidate_prices()
+    await db.refresh(investment)
     return investment
 
 
 @router.delete("/{investment_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_investment(
+async def delete_investment(
     investment_id: int,
-    db: Session = Depends(get_db)
+    user_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_db)
 ):
-    """Delete investment."""
-    investment = db.query(Investment).filter(Investment.id == investment_id).first()
-    if not investment:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Investment with id {investment_id} not found"
-        )
+    """Delete investment, optionally only among a user's investments."""
+    investment = await _get_investment(db, investment_id, user_id)
     
-    db.delete(investment)
-    db.commit()
+    await db.delete(investment)
+    await db.run_sync(lambda session: on_investment_deleted(session, investment))
+    await db.commit()
+    await analytics_cache.invalidate(investment.user_id)
     return None
 
 
+# Also an ORJSONResponse, response_model only documents the schema
 @router.get("/analytics/available-positions", response_model=List[AvailablePosition])
-def get_available_positions(
+async def get_available_positions(
     user_id: Optional[int] = None,
     investment_type: Optional[InvestmentType] = None,
-    db: Session = Depends(get_db)
+    cost_basis_method: str = Query("avg", regex="^(avg|fifo|lifo)$"),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get available positions that can be sold.
     
     Calculates net position by summing all amounts (positive buys + negative sells).
     Only returns positions where net amount > 0.
-    Uses optimized SQL query with grouping.
+    Positions are read from the ledger: one row per position for a single user,
+    summed per symbol across users otherwise.
+    Current prices are joined from the prices table.
+    With FIFO or LIFO, the invested amount is the cost of the lots still open.
     """
-    # Build query with GROUP BY for optimal performance
-    query = db.query(
-        Investment.symbol,
-        Investment.name,
-        Investment.investment_type,
-        func.sum(Investment.amount).label('net_amount'),
-        func.sum(Investment.amount * Investment.purchase_price).label('total_invested'),
-        func.max(Investment.current_price).label('current_price')
-    ).group_by(
-        Investment.symbol,
-        Investment.name, 
-        Investment.investment_type
-    ).having(func.sum(Investment.amount) > 0)
+    if cost_basis_method in LOT_METHODS:
+        total_invested = getattr(Position, f"{cost_basis_method}_open_cost")
+    else:
+        total_invested = Position.total_bought_value - Position.total_sold_value
     
     if user_id:
-        query = query.filter(Investment.user_id == user_id)
-    if investment_type:
-        query = query.filter(Investment.investment_type == investment_type)
-    
-    positions = query.all()
-    
-    result = []
-    for pos in positions:
-        net_amount = pos.net_amount
-        total_invested = pos.total_invested
-        average_purchase_price = total_invested / net_amount if net_amount > 0 else 0
-        current_price = pos.current_price or average_purchase_price
-        total_current_value = current_price * net_amount
-        unrealized_profit_loss = total_current_value - total_invested
+        query = select(
+            Position.symbol,
+            Position.name,
+            Position.investment_type,
+            (Position.bought_amount - Position.sold_amount).label('net_amount'),
+            total_invested.label('total_invested'),
+            Price.price.label('current_price')
+        ).outerjoin(
+            Price, Price.symbol == Position.symbol
+        ).where(
+            Position.user_id == user_id,
+            Position.bought_amount - Position.sold_amount > 0
+        ).order_by(Position.symbol)
         
-        result.append(AvailablePosition(
-            symbol=pos.symbol,
-            name=pos.name,
-            investment_type=pos.investment_type,
-            available_amount=round(net_amount, 6),
-            average_purchase_price=round(average_purchase_price, 2),
-            current_price=current_price,
-            total_invested=round(total_invested, 2),
-            total_current_value=round(total_current_value, 2),
-            unrealized_profit_loss=round(unrealized_profit_loss, 2)
-        ))
+        if investment_type:
+            query = query.where(Position.investment_type == investment_type)
+        
+        return ORJSONResponse([_build_available_position(**pos._mapping) for pos in await db.execute(query)])
+    
+    # Every user's ledger rows, summed per symbol; lots are matched per user
+    query = select(
+        Position.symbol,
+        Position.name,
+        Position.investment_type,
+        func.sum(Position.bought_amount - Position.sold_amount).label('net_amount'),
+        func.sum(total_invested).label('total_invested'),
+        Price.price.label('current_price')
+    ).outerjoin(
+        Price, Price.symbol == Position.symbol
+    ).group_by(
+        Position.symbol,
+        Position.name,
+        Position.investment_type,
+        Price.price
+    ).having(func.sum(Position.bought_amount - Position.sold_amount) > 0)
     
-    return result
+    if investment_type:
+        query = query.where(Position.investment_type == investment_type)
+    
+    return ORJSONResponse([_build_available_position(**pos._mapping) for pos in await db.execute(query)])
+
+
+def _investment_rows(investments: List[Investment]) -> List[dict]:
+    """Convert investments to response dicts without validating each row.
+    
+    Produces the fields of `InvestmentResponse` in its order; ORJSONResponse
+    encodes the dates and enums itself.
+    """
+    return [
+        {field: getattr(investment, field) for field in INVESTMENT_RESPONSE_FIELDS}
+        for investment in investments
+    ]
+
+
+def _build_available_position(
+    symbol: str,
+    name: str,
+    investment_type: InvestmentType,
+    net_amount: float,
+    total_invested: float,
+    current_price: Optional[float]
+) -> dict:
+    """Build an available position (see `AvailablePosition`) from net amount, net cost and current price."""
+    average_purchase_price = total_invested / net_amount if net_amount > 0 else 0
+    current_price = current_price or average_purchase_price
+    total_current_value = current_price * net_amount
+    unrealized_profit_loss = total_current_value - total_invested
+    
+    return {
+        "symbol": symbol,
+        "name": name,
+        "investment_type": investment_type,
+        "available_amount": round(net_amount, 6),
+        "average_purchase_price": round(average_purchase_price, 2),
+        "current_price": current_price,
+        "total_invested": round(total_invested, 2),
+        "total_current_value": round(total_current_value, 2),
+        "unrealized_profit_loss": round(unrealized_profit_loss, 2)
+    }
 
 
 @router.post("/sell", response_model=InvestmentResponse, status_code=status.HTTP_201_CREATED)
-def sell_investment(
+async def sell_investment(
     sell_data: InvestmentSell,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Sell investment with validation.
     
     Validates that sufficient amount is available before creating sell transaction.
     Stores sale as negative amount in the same Investment table.
+    The ledger rows of the symbol stay locked from the check until commit,
+    so concurrent sells of the same position are serialized.
     """
-    # Calculate available amount using optimized SQL query
-    query = db.query(func.sum(Investment.amount)).filter(
-        Investment.symbol == sell_data.symbol
-    )
-    
-    if sell_data.user_id:
-        query = query.filter(Investment.user_id == sell_data.user_id)
-    
-    available_amount = query.scalar() or 0
-    
-    if available_amount <= 0:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"No investment found with symbol {sell_data.symbol}"
-        )
-    
-    if available_amount < sell_data.amount:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Insufficient amount to sell. Available: {available_amount}, Requested: {sell_data.amount}"
-        )
-    
-    # Get name and investment_type from existing records
-    reference_inv = db.query(Investment).filter(
-        Investment.symbol == sell_data.symbol
-    ).first()
-    
-    if not reference_inv:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Investment with symbol {sell_data.symbol} not found"
+    async with position_lock(db, sell_data.user_id, sell_data.symbol):
+        positions = await db.run_sync(lock_positions, sell_data.user_id, sell_data.symbol)
+        available_amount = sum(position.net_amount for position in positions)
+        
+        if available_amount <= 0:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"No investment found with symbol {sell_data.symbol}"
+            )
+        
+        if available_amount < sell_data.amount:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Insufficient amount to sell. Available: {available_amount}, Requested: {sell_data.amount}"
+            )
+        
+        # Name and investment_type come from the first traded position
+        reference = positions[0]
+        
+        # Create sell transaction with NEGATIVE amount
+        db_investment = Investment(
+            user_id=sell_data.user_id,
+            name=reference.name,
+            symbol=sell_data.symbol,
+            investment_type=reference.investment_type,
+            amount=-abs(sell_data.amount),  # Store as negative
+            purchase_price=sell_data.sale_price,
+            purchase_date=sell_data.sale_date,
+            description=sell_data.description,
+            current_price=None  # No current price for sell transactions
         )
+        
+        db.add(db_investment)
+        await db.run_sync(lambda session: on_investment_created(session, db_investment))
+        await db.commit()
     
-    # Create sell transaction with NEGATIVE amount
-    db_investment = Investment(
-        user_id=sell_data.user_id,
-        name=reference_inv.name,
-        symbol=sell_data.symbol,
-        investment_type=reference_inv.investment_type,
-        amount=-abs(sell_data.amount),  # Store as negative
-        purchase_price=sell_data.sale_price,
-        purchase_date=sell_data.sale_date,
-        description=sell_data.description,
-        current_price=None  # No current price for sell transactions
-    )
-    
-    db.add(db_investment)
-    db.commit()
-    db.refresh(db_investment)
+    await analytics_cache.invalidate(db_investment.user_id)
+    await db.refresh(db_investment)
     
     return db_investment
 
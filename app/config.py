@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings
 from pydantic import Field
 
@@ -10,6 +12,26 @@ class Settings(BaseSettings):
         default="postgresql://postgres:postgres@db:5432/investments_dash",
         alias="DATABASE_URL"
     )
+    # Optional read replica for read-only endpoints; empty uses the primary
+    database_replica_url: str = Field(default="", alias="DATABASE_REPLICA_URL")
+    # Seconds after a write during which cache misses are computed from the primary
+    replica_max_lag: int = Field(default=30, alias="REPLICA_MAX_LAG")
+    db_pool_size: int = Field(default=10, alias="DB_POOL_SIZE")
+    db_max_overflow: int = Field(default=20, alias="DB_MAX_OVERFLOW")
+    db_pool_timeout: float = Field(default=10.0, alias="DB_POOL_TIMEOUT")
+    db_pool_recycle: int = Field(default=1800, alias="DB_POOL_RECYCLE")
+    db_pool_pre_ping: bool = Field(default=True, alias="DB_POOL_PRE_PING")
+    # Postgres only, in milliseconds; 0 disables the timeout
+    db_statement_timeout: int = Field(default=30000, alias="DB_STATEMENT_TIMEOUT")
+    
+    # Analytics cache
+    cache_backend: Literal["memory", "redis", "none"] = Field(default="memory", alias="CACHE_BACKEND")
+    cache_ttl: int = Field(default=300, alias="CACHE_TTL")
+    cache_max_entries: int = Field(default=1024, alias="CACHE_MAX_ENTRIES")
+    redis_url: str = Field(default="redis://localhost:6379/0", alias="REDIS_URL")
+    
+    # Earnings replay computed with NumPy when it is installed
+    analytics_kernel: Literal["numpy", "python"] = Field(default="numpy", alias="ANALYTICS_KERNEL")
     
     # Application
     app_name: str = Field(default="Investments Dashboard API", alias="APP_NAME")
@@ -1,4 +1,6 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
 
 from app.config import settings
@@ -10,22 +12,109 @@ class Base(DeclarativeBase):
     pass
 
 
-# Create database engine
-engine = create_engine(
-    settings.database_url,
-    pool_pre_ping=True,
-    echo=settings.debug
-)
+# Async drivers for the plain database URLs used in settings
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def get_async_database_url(database_url: str) -> str:
+    """Get the async driver variant of a database URL."""
+    url = make_url(database_url)
+    drivername = ASYNC_DRIVERS.get(url.get_backend_name(), url.drivername)
+    return url.set(drivername=drivername).render_as_string(hide_password=False)
+
+
+def get_engine_options(database_url: str) -> dict:
+    """Get the pool and connection options for an engine from settings.
+
+    Pool sizing only applies to server databases, and the statement timeout
+    is set per connection on Postgres, in the form the URL's driver expects.
+    """
+    url = make_url(database_url)
+    options = {
+        "pool_pre_ping": settings.db_pool_pre_ping,
+        "echo": settings.debug
+    }
+
+    if url.get_backend_name() == "sqlite":
+        return options
+
+    options.update(
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle
+    )
+
+    if url.get_backend_name() == "postgresql" and settings.db_statement_timeout:
+        if url.get_driver_name() == "asyncpg":
+            options["connect_args"] = {
+                "server_settings": {"statement_timeout": str(settings.db_statement_timeout)}
+            }
+        else:
+            options["connect_args"] = {
+                "options": f"-c statement_timeout={settings.db_statement_timeout}"
+            }
+
+    return options
+
+
+# Create database engine (sync, used by the bot, migrations and maintenance commands)
+engine = create_engine(settings.database_url, **get_engine_options(settings.database_url))
 
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Create async database engine (used by the API)
+async_database_url = get_async_database_url(settings.database_url)
+async_engine = create_async_engine(async_database_url, **get_engine_options(async_database_url))
 
-def get_db():
-    """Dependency for getting database session."""
-    db = SessionLocal()
-    try:
+# Create async session factory
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
+# Create read replica engine, falling back to the primary when not configured
+if settings.database_replica_url:
+    replica_database_url = get_async_database_url(settings.database_replica_url)
+    read_engine = create_async_engine(replica_database_url, **get_engine_options(replica_database_url))
+else:
+    read_engine = async_engine
+
+# Create read-only session factory
+ReadSessionLocal = async_sessionmaker(
+    bind=read_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
+
+async def get_db():
+    """Dependency for getting async database session."""
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
+
+def get_read_sessionmaker() -> async_sessionmaker:
+    """Dependency for getting the read-only session factory.
+
+    For responses that stream after the request's dependencies have been
+    closed and must open their own session.
+    """
+    return ReadSessionLocal
+
+
+async def get_read_db():
+    """Dependency for getting async read-only database session.
+
+    Reads may lag behind the primary when a replica is configured, so
+    anything that validates a write must use `get_db` instead.
+    """
+    async with ReadSessionLocal() as db:
+        yield db
@@ -0,0 +1,99 @@
+"""Maintenance commands for the derived portfolio tables.
+
+Usage:
+    python -m app.manage rebuild-snapshots [--user-id ID]
+    python -m app.manage refresh-snapshots
+    python -m app.manage rebuild-positions [--user-id ID]
+    python -m app.manage load-prices FILE [--chunk-size N]
+"""
+import argparse
+import logging
+from typing import Optional, Sequence
+
+from app.database import SessionLocal
+from app.services.derived import on_price_history_loaded
+from app.services.positions import rebuild_positions
+from app.services.prices import load_closes_csv
+from app.services.snapshots import rebuild_snapshots, refresh_stale_snapshots
+
+logging.basicConfig(
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    level=logging.INFO
+)
+logger = logging.getLogger(__name__)
+
+
+def rebuild_snapshots_command(args: argparse.Namespace) -> None:
+    """Regenerate the daily portfolio snapshots from the transaction log."""
+    db = SessionLocal()
+    try:
+        series = rebuild_snapshots(db, args.user_id)
+        db.commit()
+        logger.info(f"Rebuilt snapshots for {series} portfolio series")
+    finally:
+        db.close()
+
+
+def refresh_snapshots_command(args: argparse.Namespace) -> None:
+    """Rewrite the snapshot series marked stale by new closes."""
+    db = SessionLocal()
+    try:
+        series = refresh_stale_snapshots(db)
+        db.commit()
+        logger.info(f"Refreshed {series} stale portfolio series")
+    finally:
+        db.close()
+
+
+def rebuild_positions_command(args: argparse.Namespace) -> None:
+    """Regenerate the positions ledger from the transaction log."""
+    db = SessionLocal()
+    try:
+        positions = rebuild_positions(db, args.user_id)
+        db.commit()
+        logger.info(f"Rebuilt {positions} positions")
+    finally:
+        db.close()
+
+
+def load_prices_command(args: argparse.Namespace) -> None:
+    """Seed the daily price history from a local symbol,day,close CSV file."""
+    db = SessionLocal()
+    try:
+        with open(args.file, newline="") as csv_file:
+            closes, since_by_symbol = load_closes_csv(db, csv_file, args.chunk_size)
+        on_price_history_loaded(db, since_by_symbol)
+        series = refresh_stale_snapshots(db)
+        db.commit()
+        logger.info(f"Loaded {closes} closes for {len(since_by_symbol)} symbols, refreshed {series} portfolio series")
+    finally:
+        db.close()
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """Parse arguments and run the requested command."""
+    parser = argparse.ArgumentParser(prog="python -m app.manage", description=__doc__.splitlines()[0])
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    
+    snapshots = subparsers.add_parser("rebuild-snapshots", help=rebuild_snapshots_command.__doc__)
+    snapshots.add_argument("--user-id", type=int, default=None, help="Only rebuild this user")
+    snapshots.set_defaults(handler=rebuild_snapshots_command)
+    
+    refresh = subparsers.add_parser("refresh-snapshots", help=refresh_snapshots_command.__doc__)
+    refresh.set_defaults(handler=refresh_snapshots_command)
+    
+    positions = subparsers.add_parser("rebuild-positions", help=rebuild_positions_command.__doc__)
+    positions.add_argument("--user-id", type=int, default=None, help="Only rebuild this user")
+    positions.set_defaults(handler=rebuild_positions_command)
+    
+    prices = subparsers.add_parser("load-prices", help=load_prices_command.__doc__)
+    prices.add_argument("file", help="CSV file with a symbol,day,close header")
+    prices.add_argument("--chunk-size", type=int, default=5000, help="Rows written per statement")
+    prices.set_defaults(handler=load_prices_command)
+    
+    args = parser.parse_args(argv)
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
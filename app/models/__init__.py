@@ -1,6 +1,9 @@
 from app.models.investment import Investment, InvestmentType
 from app.models.user import User
 from app.models.login_token import LoginToken
+from app.models.snapshot import PortfolioSnapshot, SnapshotRefresh
+from app.models.position import Position
+from app.models.lot import Lot
+from app.models.price import Price, HistoricalPrice
 
-__all__ = ["Investment", "InvestmentType", "User", "LoginToken"]
-
+__all__ = ["Investment", "InvestmentType", "User", "LoginToken", "PortfolioSnapshot", "SnapshotRefresh", "Position", "Lot", "Price", "HistoricalPrice"]
@@ -2,10 +2,11 @@ from datetime import datetime, date
 from typing import Optional
 from enum import Enum
 
-from sqlalchemy import String, Float, func, Date, Text, Enum as SQLEnum
+from sqlalchemy import String, func, Date, Text, Index, Enum as SQLEnum
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.database import Base
+from app.models.types import FixedPoint
 
 
 class InvestmentType(str, Enum):
@@ -21,19 +22,35 @@ class InvestmentType(str, Enum):
 
 class Investment(Base):    
     __tablename__ = "investments"
+    __table_args__ = (
+        # Backs keyset pagination of a user's history by (purchase_date, id)
+        Index("ix_investments_user_date_id", "user_id", "purchase_date", "id"),
+        # Per-position aggregates, lot replays and the later-transaction check;
+        # on PostgreSQL the per-position aggregate is read from the index alone
+        Index(
+            "ix_investments_user_symbol_date_id", "user_id", "symbol", "purchase_date", "id",
+            postgresql_include=["name", "investment_type", "amount", "purchase_price"]
+        ),
+        # All-users aggregates, partitioned by symbol in transaction order, and
+        # the lookup of a symbol's holders when a new close marks them stale
+        Index(
+            "ix_investments_symbol_id", "symbol", "id",
+            postgresql_include=["user_id", "name", "investment_type", "amount", "purchase_price"]
+        ),
+    )
     
-    id: Mapped[int] = mapped_column(primary_key=True, index=True)
-    user_id: Mapped[Optional[int]] = mapped_column(nullable=True, index=True)  # For Telegram user
-    name: Mapped[str] = mapped_column(String(255), nullable=False, index=True)
-    symbol: Mapped[str] = mapped_column(String(50), nullable=False, index=True)
+    id: Mapped[int] = mapped_column(primary_key=True)
+    user_id: Mapped[Optional[int]] = mapped_column(nullable=True)  # For Telegram user
+    name: Mapped[str] = mapped_column(String(255), nullable=False)
+    symbol: Mapped[str] = mapped_column(String(50), nullable=False)
     investment_type: Mapped[InvestmentType] = mapped_column(
         SQLEnum(InvestmentType, native_enum=False, length=50),
         nullable=False,
         index=True
     )
-    amount: Mapped[float] = mapped_column(Float, nullable=False)
-    purchase_price: Mapped[float] = mapped_column(Float, nullable=False)
-    current_price: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    amount: Mapped[float] = mapped_column(FixedPoint, nullable=False)
+    purchase_price: Mapped[float] = mapped_column(FixedPoint, nullable=False)
+    current_price: Mapped[Optional[float]] = mapped_column(FixedPoint, nullable=True)
     purchase_date: Mapped[date] = mapped_column(Date, nullable=False, index=True)
     description: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     created_at: Mapped[datetime] = mapped_column(
@@ -0,0 +1,37 @@
+"""Open purchase lot model."""
+from datetime import date
+from typing import Optional
+
+from sqlalchemy import String, Date, ForeignKey, Index
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+from app.models.types import FixedPoint
+
+
+class Lot(Base):
+    """A buy with the amount still open under FIFO and under LIFO matching.
+
+    Lots of a position are ordered by (opened_on, investment_id), so a sell
+    consumes them from the front (FIFO) or the back (LIFO) without rescanning
+    earlier buys. A lot is removed once it is closed under both methods.
+    """
+    __tablename__ = "lots"
+    __table_args__ = (
+        Index("ix_lots_user_symbol_opened", "user_id", "symbol", "opened_on", "investment_id"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    user_id: Mapped[Optional[int]] = mapped_column(nullable=True)
+    symbol: Mapped[str] = mapped_column(String(50), nullable=False)
+    investment_id: Mapped[int] = mapped_column(
+        ForeignKey("investments.id", ondelete="CASCADE"),
+        nullable=False
+    )
+    opened_on: Mapped[date] = mapped_column(Date, nullable=False)
+    price: Mapped[float] = mapped_column(FixedPoint, nullable=False)
+    fifo_remaining: Mapped[float] = mapped_column(FixedPoint, nullable=False)
+    lifo_remaining: Mapped[float] = mapped_column(FixedPoint, nullable=False)
+
+    def __repr__(self) -> str:
+        return f"<Lot {self.user_id}/{self.symbol} {self.opened_on}: {self.fifo_remaining}/{self.lifo_remaining}>"
@@ -0,0 +1,47 @@
+"""Materialized position ledger model."""
+from typing import Optional
+
+from sqlalchemy import String, Index, Enum as SQLEnum
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+from app.models.types import FixedPoint
+from app.models.investment import InvestmentType
+
+
+class Position(Base):
+    """Net position of a user in one symbol, maintained on every transaction write.
+
+    Mirrors the per-symbol sums of the transaction log so analytics can read
+    one row per position instead of scanning every transaction. The realized
+    P/L and the cost of the open lots are also kept per lot matching method.
+    """
+    __tablename__ = "positions"
+    __table_args__ = (
+        Index("ix_positions_user_symbol", "user_id", "symbol", unique=True),
+    )
+    
+    id: Mapped[int] = mapped_column(primary_key=True)
+    user_id: Mapped[Optional[int]] = mapped_column(nullable=True)
+    symbol: Mapped[str] = mapped_column(String(50), nullable=False)
+    name: Mapped[str] = mapped_column(String(255), nullable=False)
+    investment_type: Mapped[InvestmentType] = mapped_column(
+        SQLEnum(InvestmentType, native_enum=False, length=50),
+        nullable=False
+    )
+    bought_amount: Mapped[float] = mapped_column(FixedPoint, nullable=False, default=0)
+    sold_amount: Mapped[float] = mapped_column(FixedPoint, nullable=False, default=0)
+    total_bought_value: Mapped[float] = mapped_column(FixedPoint, nullable=False, default=0)
+    total_sold_value: Mapped[float] = mapped_column(FixedPoint, nullable=False, default=0)
+    fifo_realized: Mapped[float] = mapped_column(FixedPoint, nullable=False, default=0)
+    fifo_open_cost: Mapped[float] = mapped_column(FixedPoint, nullable=False, default=0)
+    lifo_realized: Mapped[float] = mapped_column(FixedPoint, nullable=False, default=0)
+    lifo_open_cost: Mapped[float] = mapped_column(FixedPoint, nullable=False, default=0)
+    
+    @property
+    def net_amount(self) -> float:
+        """Amount still held (buys - sells)."""
+        return self.bought_amount - self.sold_amount
+    
+    def __repr__(self) -> str:
+        return f"<Position {self.user_id}/{self.symbol}: {self.net_amount}>"
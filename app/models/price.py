@@ -0,0 +1,43 @@
+"""Current and historical price models."""
+from datetime import date, datetime
+
+from sqlalchemy import String, Date, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+from app.models.types import FixedPoint
+
+
+class Price(Base):
+    """Latest known price of a symbol, shared by every position in it.
+
+    Transactions still record the price seen when they were entered; this
+    table is what current valuations are read from.
+    """
+    __tablename__ = "prices"
+    
+    symbol: Mapped[str] = mapped_column(String(50), primary_key=True)
+    price: Mapped[float] = mapped_column(FixedPoint, nullable=False)
+    as_of: Mapped[datetime] = mapped_column(
+        insert_default=func.now(),
+        nullable=False
+    )
+    
+    def __repr__(self) -> str:
+        return f"<Price {self.symbol}: {self.price}>"
+
+
+class HistoricalPrice(Base):
+    """Close of a symbol on one day, for valuing positions over time.
+
+    Keyed by (symbol, day), so the primary key doubles as the index for
+    loading a symbol's history in order.
+    """
+    __tablename__ = "price_history"
+    
+    symbol: Mapped[str] = mapped_column(String(50), primary_key=True)
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    close: Mapped[float] = mapped_column(FixedPoint, nullable=False)
+    
+    def __repr__(self) -> str:
+        return f"<HistoricalPrice {self.symbol} {self.day}: {self.close}>"
@@ -0,0 +1,61 @@
+"""Daily portfolio snapshot model."""
+from datetime import date
+from typing import Optional
+
+from sqlalchemy import Integer, Date, Index, Enum as SQLEnum
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+from app.models.investment import InvestmentType
+from app.models.types import FixedPoint
+
+
+class PortfolioSnapshot(Base):
+    """Cumulative portfolio state of one investment type at the end of a day.
+
+    Derived from the transaction log: a row exists for every day with a
+    transaction and is rewritten whenever an earlier transaction changes.
+    """
+    __tablename__ = "portfolio_snapshots"
+    __table_args__ = (
+        Index("ix_portfolio_snapshots_user_type_day", "user_id", "investment_type", "day", unique=True),
+    )
+    
+    id: Mapped[int] = mapped_column(primary_key=True)
+    user_id: Mapped[Optional[int]] = mapped_column(nullable=True)
+    investment_type: Mapped[InvestmentType] = mapped_column(
+        SQLEnum(InvestmentType, native_enum=False, length=50),
+        nullable=False
+    )
+    day: Mapped[date] = mapped_column(Date, nullable=False)
+    invested: Mapped[float] = mapped_column(FixedPoint, nullable=False)
+    current_value: Mapped[float] = mapped_column(FixedPoint, nullable=False)
+    count: Mapped[int] = mapped_column(Integer, nullable=False)
+    total_amount: Mapped[float] = mapped_column(FixedPoint, nullable=False)
+    
+    def __repr__(self) -> str:
+        return f"<PortfolioSnapshot {self.user_id}/{self.investment_type} {self.day}>"
+
+
+class SnapshotRefresh(Base):
+    """A snapshot series left to recompute from a day on.
+
+    Written when new closes change the value of positions held by other users
+    than the writer: their series are recomputed later (or rolled up around
+    the stale days on read) instead of inside the write.
+    """
+    __tablename__ = "snapshot_refreshes"
+    __table_args__ = (
+        Index("ix_snapshot_refreshes_user_type", "user_id", "investment_type", unique=True),
+    )
+    
+    id: Mapped[int] = mapped_column(primary_key=True)
+    user_id: Mapped[Optional[int]] = mapped_column(nullable=True)
+    investment_type: Mapped[InvestmentType] = mapped_column(
+        SQLEnum(InvestmentType, native_enum=False, length=50),
+        nullable=False
+    )
+    since: Mapped[date] = mapped_column(Date, nullable=False)
+    
+    def __repr__(self) -> str:
+        return f"<SnapshotRefresh {self.user_id}/{self.investment_type} since {self.since}>"
@@ -0,0 +1,21 @@
+"""Column types shared by the models."""
+from typing import Optional
+
+from sqlalchemy import Numeric
+from sqlalchemy.types import TypeDecorator
+
+# Decimal places kept for quantities, prices and money
+DECIMAL_PLACES = 8
+
+
+class FixedPoint(TypeDecorator):
+    """Exact fixed-point NUMERIC in the database, read and written as float.
+
+    Values are rounded to `DECIMAL_PLACES` when bound, so every backend
+    stores the same decimal, including SQLite, which has no fixed-point type.
+    """
+    impl = Numeric(20, DECIMAL_PLACES, asdecimal=False)
+    cache_ok = True
+
+    def process_bind_param(self, value: Optional[float], dialect) -> Optional[float]:
+        return round(value, DECIMAL_PLACES) if value is not None else None
@@ -4,7 +4,14 @@ from app.schemas.investment import (
     InvestmentUpdate,
     InvestmentResponse,
     InvestmentSell,
-    AvailablePosition
+    AvailablePosition,
+    DashboardData,
+    ImportRowError,
+    ImportResult,
+    PriceQuote,
+    BulkPriceUpdate,
+    BulkPriceResult,
+    ReturnsData
 )
 from app.schemas.auth import (
     TelegramAuthData,
@@ -19,6 +26,13 @@ __all__ = [
     "InvestmentResponse",
     "InvestmentSell",
     "AvailablePosition",
+    "DashboardData",
+    "ImportRowError",
+    "ImportResult",
+    "PriceQuote",
+    "BulkPriceUpdate",
+    "BulkPriceResult",
+    "ReturnsData",
     "TelegramAuthData",
     "UserResponse",
     "AuthResponse"
@@ -1,5 +1,5 @@
 from datetime import datetime, date
-from typing import Optional
+from typing import Any, Dict, List, Optional
 from pydantic import BaseModel, Field
 
 from app.models.investment import InvestmentType
@@ -88,3 +88,53 @@ class AvailablePosition(BaseModel):
     total_current_value: float = Field(..., description="Current value of position")
     unrealized_profit_loss: float = Field(..., description="Unrealized profit/loss")
 
+
+class ImportRowError(BaseModel):
+    """Schema for a rejected row of an import."""
+    line: int = Field(..., description="Line number in the uploaded file")
+    errors: List[Dict[str, Optional[str]]] = Field(..., description="Field and message of each problem")
+
+
+class ImportResult(BaseModel):
+    """Schema for the outcome of an import."""
+    imported: int = Field(..., description="Number of transactions created")
+    failed: int = Field(..., description="Number of rejected rows")
+    errors: List[ImportRowError] = Field(..., description="Rejected rows, up to the first 1000")
+
+
+class PriceQuote(BaseModel):
+    """Schema for the current price of one symbol."""
+    symbol: str = Field(..., min_length=1, max_length=50, description="Investment symbol/ticker")
+    price: float = Field(..., gt=0, description="Current price per unit")
+
+
+class BulkPriceUpdate(BaseModel):
+    """Schema for a batch of price quotes."""
+    prices: List[PriceQuote] = Field(..., min_length=1, max_length=10000)
+
+
+class BulkPriceResult(BaseModel):
+    """Schema for the outcome of a bulk price update."""
+    symbols: int = Field(..., description="Number of distinct symbols quoted")
+    changed: int = Field(..., description="Number of symbols whose price changed")
+
+
+class ReturnsData(BaseModel):
+    """Schema for time-weighted and money-weighted returns over a date range."""
+    start_date: Optional[date] = Field(None, description="First day of the range")
+    end_date: Optional[date] = Field(None, description="Last day of the range")
+    start_value: float = Field(..., description="Value held before the range")
+    end_value: float = Field(..., description="Value held at the end of the range")
+    net_cash_flow: float = Field(..., description="Buys minus sells within the range")
+    profit_loss: float = Field(..., description="Change in value not explained by cash flows")
+    twr: Optional[float] = Field(None, description="Time-weighted return over the range, as a fraction")
+    xirr: Optional[float] = Field(None, description="Money-weighted annual return, as a fraction")
+
+
+class DashboardData(BaseModel):
+    """Schema for everything the dashboard shows, computed in one pass."""
+    overview: Dict[str, Any] = Field(..., description="Portfolio overview, as in /analytics/overview")
+    earnings: List[Dict[str, Any]] = Field(..., description="Earnings series, as in /analytics/earnings")
+    available_positions: List[AvailablePosition]
+    recent_investments: List[InvestmentResponse] = Field(..., description="Latest transactions, newest first")
+
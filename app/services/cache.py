@@ -0,0 +1,280 @@
+"""Response cache for the analytics endpoints.
+
+Entries are keyed by endpoint, user and query parameters, plus a version
+number that every write bumps. A write never deletes entries: it moves the
+user (and the all-users view) to a new version, so older entries are no
+longer looked up and age out through the TTL or LRU eviction. Current prices
+are shared by all users, so they have one version that is part of every key.
+
+With a read replica, a result recomputed right after a write could be read
+from a replica that has not replayed the write yet and be cached under the
+new version. A write therefore also flags its scope for `primary_window`
+seconds, and misses in a flagged scope are computed from the primary.
+
+The memory backend keeps versions and flags inside one process, so a write
+handled by one worker does not invalidate the others: it is only correct
+with a single worker. Deployments with several workers use the redis
+backend, which shares them.
+"""
+import json
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Optional
+
+from app.config import settings
+
+try:
+    from redis import asyncio as redis
+except ImportError:  # Optional, only needed for CACHE_BACKEND=redis
+    redis = None
+
+# Version of the all-users view, bumped by every write
+ALL_USERS = "all"
+
+# Version of the current prices, which every user's results depend on
+PRICES = "prices"
+
+
+class CacheBackend(ABC):
+    """Storage for cached values and version counters."""
+
+    name: str
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[Any]:
+        """Get a cached value, or None when it is missing or expired."""
+
+    @abstractmethod
+    async def set(self, key: str, value: Any, ttl: int) -> None:
+        """Store a value for `ttl` seconds."""
+
+    @abstractmethod
+    async def get_version(self, key: str) -> int:
+        """Get a version counter, 0 when never bumped."""
+
+    @abstractmethod
+    async def bump_version(self, key: str) -> int:
+        """Increment a version counter and return the new version."""
+
+    @abstractmethod
+    async def set_flag(self, key: str, ttl: int) -> None:
+        """Raise a flag for `ttl` seconds."""
+
+    @abstractmethod
+    async def has_flag(self, key: str) -> bool:
+        """Check whether a flag is raised and not expired."""
+
+    @abstractmethod
+    async def clear(self) -> None:
+        """Drop all cached values, versions and flags."""
+
+
+class MemoryCache(CacheBackend):
+    """In-process LRU cache with per-entry TTL and a size limit.
+
+    Version counters and flags are kept apart from the entries, so eviction
+    can never roll a user back to an older version. They are not shared
+    between processes, so this backend only suits a single worker.
+    """
+
+    name = "memory"
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()
+        self._versions = {}
+        self._flags = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: Any, ttl: int) -> None:
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get_version(self, key: str) -> int:
+        return self._versions.get(key, 0)
+
+    async def bump_version(self, key: str) -> int:
+        self._versions[key] = self._versions.get(key, 0) + 1
+        return self._versions[key]
+
+    async def set_flag(self, key: str, ttl: int) -> None:
+        self._flags[key] = time.monotonic() + ttl
+
+    async def has_flag(self, key: str) -> bool:
+        expires_at = self._flags.get(key)
+        if expires_at is None:
+            return False
+        if expires_at <= time.monotonic():
+            del self._flags[key]
+            return False
+        return True
+
+    async def clear(self) -> None:
+        self._entries.clear()
+        self._versions.clear()
+        self._flags.clear()
+
+
+class RedisCache(CacheBackend):
+    """Cache shared by all workers through a Redis-protocol server.
+
+    Values are stored as JSON with a server-side TTL; eviction beyond that is
+    left to the server's maxmemory policy.
+    """
+
+    name = "redis"
+
+    def __init__(self, url: str, prefix: str = "investments:cache:"):
+        if redis is None:
+            raise RuntimeError("CACHE_BACKEND=redis requires the redis package")
+        self.client = redis.from_url(url)
+        self.prefix = prefix
+
+    async def get(self, key: str) -> Optional[Any]:
+        value = await self.client.get(self.prefix + key)
+        return json.loads(value) if value is not None else None
+
+    async def set(self, key: str, value: Any, ttl: int) -> None:
+        await self.client.set(self.prefix + key, json.dumps(value), ex=ttl)
+
+    async def get_version(self, key: str) -> int:
+        return int(await self.client.get(self.prefix + "version:" + key) or 0)
+
+    async def bump_version(self, key: str) -> int:
+        return await self.client.incr(self.prefix + "version:" + key)
+
+    async def set_flag(self, key: str, ttl: int) -> None:
+        await self.client.set(self.prefix + "flag:" + key, 1, ex=ttl)
+
+    async def has_flag(self, key: str) -> bool:
+        return bool(await self.client.exists(self.prefix + "flag:" + key))
+
+    async def clear(self) -> None:
+        async for key in self.client.scan_iter(match=self.prefix + "*"):
+            await self.client.delete(key)
+
+
+class AnalyticsCache:
+    """Versioned read-through cache with hit and miss counters.
+
+    `primary_window` is how long, in seconds, misses after a write are
+    computed from the primary; 0 when there is no replica to lag behind.
+    """
+
+    def __init__(self, backend: Optional[CacheBackend], ttl: int, primary_window: int = 0):
+        self.backend = backend
+        self.ttl = ttl
+        self.primary_window = primary_window
+        self.hits = 0
+        self.misses = 0
+
+    async def get_or_compute(
+        self,
+        endpoint: str,
+        user_id: Optional[int],
+        params: dict,
+        compute: Callable[[bool], Awaitable[Any]]
+    ) -> Any:
+        """Get a cached result, computing and storing it on a miss.
+
+        The version is read before computing, so a result that races with a
+        write is stored under the outdated version and never served.
+        `compute` is called with True when it must read from the primary,
+        because the scope or the prices were written within `primary_window`.
+        """
+        if self.backend is None:
+            return await compute(False)
+
+        scope = str(user_id) if user_id else ALL_USERS
+        version = await self.backend.get_version(scope)
+        prices_version = await self.backend.get_version(PRICES)
+        key = f"{endpoint}:{scope}:v{version}.{prices_version}:{json.dumps(params, sort_keys=True, default=str)}"
+
+        value = await self.backend.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+
+        self.misses += 1
+        value = await compute(await self._written_recently(scope))
+        await self.backend.set(key, value, self.ttl)
+        return value
+
+    async def _written_recently(self, scope: str) -> bool:
+        """Check whether a recompute in `scope` could see a lagging replica."""
+        if not self.primary_window:
+            return False
+        return await self.backend.has_flag(scope) or await self.backend.has_flag(PRICES)
+
+    async def _bump(self, scope: str) -> None:
+        await self.backend.bump_version(scope)
+        if self.primary_window:
+            await self.backend.set_flag(scope, self.primary_window)
+
+    async def invalidate(self, *user_ids: Optional[int]) -> None:
+        """Invalidate the cached results of users whose transactions changed."""
+        if self.backend is None:
+            return
+
+        for user_id in set(user_ids):
+            if user_id:
+                await self._bump(str(user_id))
+        await self._bump(ALL_USERS)
+
+    async def invalidate_prices(self) -> None:
+        """Invalidate every cached result after current prices changed."""
+        if self.backend is not None:
+            await self._bump(PRICES)
+
+    async def reset(self) -> None:
+        """Drop all entries and versions and zero the counters."""
+        if self.backend is not None:
+            await self.backend.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> dict:
+        """Get the hit and miss counters of this process."""
+        lookups = self.hits + self.misses
+        return {
+            "backend": self.backend.name if self.backend is not None else "none",
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "entries": len(self.backend) if isinstance(self.backend, MemoryCache) else None
+        }
+
+
+def create_backend() -> Optional[CacheBackend]:
+    """Create the cache backend selected in settings."""
+    if settings.cache_backend == "memory":
+        return MemoryCache(settings.cache_max_entries)
+    if settings.cache_backend == "redis":
+        return RedisCache(settings.redis_url)
+    return None
+
+
+analytics_cache = AnalyticsCache(
+    create_backend(),
+    settings.cache_ttl,
+    settings.replica_max_lag if settings.database_replica_url else 0
+)
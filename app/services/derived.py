@@ -0,0 +1,150 @@
+"""Keeps the derived tables in step with writes to transactions and prices.
+
+Each hook runs inside the writing transaction, so the positions ledger, the
+daily snapshots and the prices commit or roll back together with the write
+itself. The hooks take a sync session; async handlers call them through
+`AsyncSession.run_sync`.
+
+Snapshots value positions at the historical closes. A write refreshes only
+its own snapshot series; a new close also marks the series of every other
+user trading the symbol stale from that day on (see `mark_stale`), so their
+histories are not replayed inside the write.
+"""
+from datetime import date
+from typing import Dict, Iterable, NamedTuple, Optional, Tuple, Union
+
+from sqlalchemy import inspect
+from sqlalchemy.orm import Session
+
+from app.models.investment import Investment, InvestmentType
+from app.schemas.investment import InvestmentCreate
+from app.services.positions import apply_transaction, recompute_position
+from app.services.prices import record_closes, record_entered_closes, set_price, update_prices, upsert_prices
+from app.services.snapshots import mark_stale, refresh_snapshots
+
+# Snapshots are kept per (user_id, investment_type), refreshed from a day on
+SnapshotSeries = Tuple[Optional[int], InvestmentType]
+
+
+class TransactionKey(NamedTuple):
+    """The fields of a transaction that decide which derived rows it feeds."""
+    user_id: Optional[int]
+    symbol: str
+    investment_type: InvestmentType
+    purchase_date: date
+
+    @classmethod
+    def of(cls, investment: Union[Investment, InvestmentCreate]) -> "TransactionKey":
+        return cls(investment.user_id, investment.symbol, investment.investment_type, investment.purchase_date)
+
+
+def _include(series: Dict[SnapshotSeries, date], key: SnapshotSeries, since: date) -> None:
+    """Add a snapshot series to refresh, keeping its earliest day."""
+    if key not in series or since < series[key]:
+        series[key] = since
+
+
+def _refresh(db: Session, series: Dict[SnapshotSeries, date]) -> None:
+    for (user_id, investment_type), since in series.items():
+        refresh_snapshots(db, user_id, investment_type, since)
+
+
+def _record_entered_price(db: Session, investment: Investment) -> None:
+    """Record the price entered with a transaction.
+
+    It becomes the symbol's current price, and its close on the purchase day
+    unless that day already has one.
+    """
+    set_price(db, investment.symbol, investment.current_price)
+    mark_stale(db, record_entered_closes(db, {(investment.symbol, investment.purchase_date): investment.current_price}))
+
+
+def on_investment_created(db: Session, investment: Investment) -> None:
+    """Add a new transaction (buy or sell) to the derived tables."""
+    series = {(investment.user_id, investment.investment_type): investment.purchase_date}
+
+    if investment.current_price:
+        _record_entered_price(db, investment)
+
+    apply_transaction(db, investment)
+    _refresh(db, series)
+
+
+def on_investment_updated(db: Session, investment: Investment, previous: TransactionKey) -> None:
+    """Recompute the derived rows touched by an edited transaction, before and after the edit."""
+    current = TransactionKey.of(investment)
+
+    # Refresh snapshots from the earliest affected day
+    series = {}
+    _include(series, (previous.user_id, previous.investment_type), previous.purchase_date)
+    _include(series, (current.user_id, current.investment_type), current.purchase_date)
+
+    # A price entered, or moved to another symbol or day, is recorded there
+    state = inspect(investment)
+    if investment.current_price and any(
+        state.attrs[field].history.has_changes() for field in ("current_price", "symbol", "purchase_date")
+    ):
+        _record_entered_price(db, investment)
+
+    recompute_position(db, current.user_id, current.symbol)
+    if (previous.user_id, previous.symbol) != (current.user_id, current.symbol):
+        recompute_position(db, previous.user_id, previous.symbol)
+
+    _refresh(db, series)
+
+
+def on_investment_deleted(db: Session, investment: Investment) -> None:
+    """Remove a deleted transaction from the derived tables."""
+    recompute_position(db, investment.user_id, investment.symbol)
+    refresh_snapshots(db, investment.user_id, investment.investment_type, investment.purchase_date)
+
+
+def on_investments_imported(
+    db: Session,
+    keys: Iterable[TransactionKey],
+    closes: Dict[Tuple[str, date], float]
+) -> None:
+    """Bring the derived tables up to date after a bulk import.
+
+    `closes` are the prices entered with the imported rows by (symbol,
+    purchase day). They are recorded in one statement as closes of the days
+    without one, and the latest of each symbol becomes its current price.
+    Each touched position is then recomputed once and each imported snapshot
+    series refreshed once from its earliest affected day; other holders of
+    the symbols are marked stale.
+    """
+    latest = {}
+    for (symbol, day), close in closes.items():
+        if symbol not in latest or day >= latest[symbol][0]:
+            latest[symbol] = (day, close)
+
+    upsert_prices(db, {symbol: close for symbol, (_, close) in latest.items()})
+    mark_stale(db, record_entered_closes(db, closes))
+
+    positions = set()
+    series = {}
+
+    for key in keys:
+        positions.add((key.user_id, key.symbol))
+        _include(series, (key.user_id, key.investment_type), key.purchase_date)
+
+    for user_id, symbol in positions:
+        recompute_position(db, user_id, symbol)
+    _refresh(db, series)
+
+
+def on_prices_updated(db: Session, prices: Dict[str, float], day: date) -> int:
+    """Apply price quotes as current prices and as closes on `day`.
+
+    The snapshots valued with the closes are marked stale rather than
+    rewritten. Returns how many symbols changed price.
+    """
+    changed = update_prices(db, prices)
+    record_closes(db, {(symbol, day): price for symbol, price in prices.items()})
+    on_price_history_loaded(db, {symbol: day for symbol in prices})
+    return changed
+
+
+def on_price_history_loaded(db: Session, since_by_symbol: Dict[str, date]) -> None:
+    """Mark the snapshots valued with newly written closes stale from their earliest day."""
+    mark_stale(db, since_by_symbol)
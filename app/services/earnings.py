@@ -0,0 +1,301 @@
+"""Running-totals engine for the cumulative earnings series."""
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from datetime import date
+from itertools import groupby
+from operator import attrgetter
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from app.services.periods import bucket_function, format_bucket, get_bucket
+from app.services.units import from_units, to_units, value_units
+
+
+def make_point(
+    period_key: str,
+    invested: float,
+    current_value: float,
+    count: int,
+    total_amount: float
+) -> dict:
+    """Build an earnings data point from cumulative totals."""
+    profit_loss = current_value - invested
+
+    return {
+        "date": period_key,
+        "invested": round(invested, 2),
+        "current_value": round(current_value, 2),
+        "profit_loss": round(profit_loss, 2),
+        "count": count,
+        "total_amount": round(total_amount, 6)  # Total quantity with precision
+    }
+
+
+def fill_periods(
+    points: List[Tuple[int, dict]],
+    aggregate_by: str,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None
+) -> List[dict]:
+    """Emit a point for every period between `start_date` and `end_date`.
+
+    Takes (period ordinal, point) pairs in period order. Periods without a
+    point repeat the last earlier one, as nothing held changed in them;
+    periods before the first point are empty. `points` must start before
+    `start_date` for positions to carry into the range. Without a start
+    date, the range starts at the first point; without an end date, it runs
+    to today's period, or to the last point if that is later.
+    """
+    if not points and not start_date:
+        return []
+
+    first = get_bucket(start_date, aggregate_by) if start_date else points[0][0]
+    if end_date:
+        last = get_bucket(end_date, aggregate_by)
+    else:
+        last = max(get_bucket(date.today(), aggregate_by), points[-1][0] if points else first)
+
+    # State carried in from before the range
+    carried = None
+    index = 0
+    while index < len(points) and points[index][0] < first:
+        carried = points[index][1]
+        index += 1
+
+    result = []
+    for bucket in range(first, last + 1):
+        if index < len(points) and points[index][0] == bucket:
+            carried = points[index][1]
+            index += 1
+            result.append(carried)
+        elif carried is not None:
+            result.append({**carried, "date": format_bucket(bucket, aggregate_by)})
+        else:
+            result.append(make_point(format_bucket(bucket, aggregate_by), 0, 0, 0, 0))
+
+    return result
+
+
+class PriceHistory:
+    """Daily closes per symbol as sorted arrays for as-of lookups.
+
+    A position is valued at the last close on or before the valuation day,
+    found by bisecting the symbol's days instead of querying per period.
+    """
+
+    def __init__(self, closes: Iterable[Tuple[str, date, float]] = ()):
+        self._days: Dict[str, List[date]] = {}
+        self._closes: Dict[str, List[float]] = {}
+
+        for symbol, day, close in sorted(closes):
+            self._days.setdefault(symbol, []).append(day)
+            self._closes.setdefault(symbol, []).append(close)
+
+    def close_as_of(self, symbol: str, day: date) -> Optional[float]:
+        """Get the last close of a symbol on or before `day`."""
+        days = self._days.get(symbol)
+        if not days:
+            return None
+
+        index = bisect_right(days, day)
+        return self._closes[symbol][index - 1] if index else None
+
+    def days(self, symbol: str, since: date = date.min) -> List[date]:
+        """Get the days a symbol has a close on, from `since` onward."""
+        days = self._days.get(symbol, [])
+        return days[bisect_left(days, since):]
+
+    def series(self, symbol: str) -> Tuple[List[date], List[float]]:
+        """Get a symbol's close days and closes in day order."""
+        return self._days.get(symbol, []), self._closes.get(symbol, [])
+
+
+def iter_events(
+    investments: Iterable,
+    prices: PriceHistory,
+    carried: Iterable[str] = (),
+    since: Optional[date] = None
+) -> Iterator[Tuple[date, list, Set[str]]]:
+    """Merge transactions sorted by purchase date with the closes of their symbols.
+
+    Yields (day, transactions, priced symbols) for every day with a
+    transaction or a close of a symbol traded in `investments`. A replay that
+    starts with positions carried in passes their symbols as `carried` and
+    its first day as `since`, so their closes are merged from that day.
+    """
+    trades = [(day, list(day_trades)) for day, day_trades in groupby(investments, key=attrgetter("purchase_date"))]
+    symbols = {inv.symbol for _, day_trades in trades for inv in day_trades}.union(carried)
+    if not symbols:
+        return
+
+    priced = defaultdict(set)
+    for symbol in symbols:
+        for day in prices.days(symbol, since=since or trades[0][0]):
+            priced[day].add(symbol)
+
+    trades_by_day = dict(trades)
+    for day in sorted(trades_by_day.keys() | priced.keys()):
+        yield day, trades_by_day.get(day, []), priced.get(day, set())
+
+
+class RunningPortfolio:
+    """Net positions per symbol with portfolio-wide totals kept up to date.
+
+    Transactions are applied one at a time and only mark their symbol as dirty.
+    `refresh` re-values just the dirty symbols; every symbol owns a slot (in
+    first-seen order) in flat contribution lists, so the totals are a C-level
+    `sum` over those lists. Amounts and values are kept in integer units (see
+    `app.services.units`), so the running sums are exact.
+
+    Positions are valued at their close as of the refresh day, falling back
+    to the average purchase price when the symbol has no close yet.
+    """
+
+    def __init__(self, prices: Optional[PriceHistory] = None):
+        self.prices = prices or PriceHistory()
+        # {symbol: {net_amount, total_bought_value}} in units
+        self.positions: Dict[str, dict] = {}
+        self._slots: Dict[str, int] = {}
+        self._invested: List[int] = []
+        self._current_values: List[int] = []
+        self._amounts: List[int] = []
+        self._active = set()
+        self._dirty = set()
+
+        self.invested = 0
+        self.current_value = 0
+        self.count = 0
+        self.total_amount = 0
+
+    def _position(self, symbol: str) -> dict:
+        """Get a symbol's position, opening it with its own slot when first seen."""
+        pos = self.positions.get(symbol)
+        if pos is None:
+            pos = self.positions[symbol] = {
+                "net_amount": 0,
+                "total_bought_value": 0
+            }
+            self._slots[symbol] = len(self._invested)
+            self._invested.append(0)
+            self._current_values.append(0)
+            self._amounts.append(0)
+        return pos
+
+    def carry(self, symbol: str, net_amount: int, total_bought_value: int) -> None:
+        """Add a position's totals (in units) carried in from earlier transactions."""
+        pos = self._position(symbol)
+        pos["net_amount"] += net_amount
+        pos["total_bought_value"] += total_bought_value
+        self._dirty.add(symbol)
+
+    def apply(self, inv) -> None:
+        """Apply a single transaction (buy: positive amount, sell: negative amount)."""
+        pos = self._position(inv.symbol)
+        amount = to_units(inv.amount)
+        pos["net_amount"] += amount
+        if amount > 0:  # Only count buys for cost basis
+            pos["total_bought_value"] += value_units(amount, to_units(inv.purchase_price))
+
+        self._dirty.add(inv.symbol)
+
+    def holds(self, symbols: Iterable[str]) -> bool:
+        """Check whether any of the symbols is an open position."""
+        return any(
+            symbol in self.positions and self.positions[symbol]["net_amount"] > 0
+            for symbol in symbols
+        )
+
+    def reprice(self, symbols: Iterable[str]) -> None:
+        """Mark symbols with a new close as dirty."""
+        self._dirty.update(symbol for symbol in symbols if symbol in self.positions)
+
+    def refresh(self, day: date) -> None:
+        """Re-value dirty symbols as of `day` and recompute the totals."""
+        if not self._dirty:
+            return
+
+        for symbol in self._dirty:
+            slot = self._slots[symbol]
+            pos = self.positions[symbol]
+            net_amount = pos["net_amount"]
+
+            if net_amount > 0:  # Only count active positions
+                # The remaining position is carried at the full cost of the buys
+                current_price = self.prices.close_as_of(symbol, day)
+
+                self._invested[slot] = pos["total_bought_value"]
+                self._current_values[slot] = (
+                    value_units(net_amount, to_units(current_price)) if current_price
+                    else pos["total_bought_value"]
+                )
+                self._amounts[slot] = net_amount
+                self._active.add(symbol)
+            else:
+                self._invested[slot] = 0
+                self._current_values[slot] = 0
+                self._amounts[slot] = 0
+                self._active.discard(symbol)
+
+        self._dirty.clear()
+        self.count = len(self._active)
+        self.invested = from_units(sum(self._invested))
+        self.current_value = from_units(sum(self._current_values))
+        self.total_amount = from_units(sum(self._amounts))
+
+    def point(self, period_key: str) -> dict:
+        """Build the earnings data point for the current totals."""
+        return make_point(period_key, self.invested, self.current_value, self.count, self.total_amount)
+
+
+def build_earnings_series(
+    investments: Iterable,
+    aggregate_by: str,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    prices: Optional[PriceHistory] = None,
+    fill: bool = False
+) -> List[dict]:
+    """Build the cumulative earnings series from transactions sorted by purchase date.
+
+    Emits one point per period that contains a transaction or a close of an
+    open position, valued as of the last such day in the period and limited
+    to the periods between `start_date` and `end_date`. Transactions before
+    the range still contribute to the positions carried into it. With `fill`,
+    every period of the range gets a point (see `fill_periods`).
+    """
+    start_bucket = get_bucket(start_date, aggregate_by) if start_date and not fill else None
+    end_bucket = get_bucket(end_date, aggregate_by) if end_date else None
+    bucket_of = bucket_function(aggregate_by)
+
+    prices = prices or PriceHistory()
+    portfolio = RunningPortfolio(prices)
+    result = []
+    period = None
+    last_day = None
+
+    def flush():
+        if period is not None and (start_bucket is None or period >= start_bucket):
+            portfolio.refresh(last_day)
+            result.append((period, portfolio.point(format_bucket(period, aggregate_by))))
+
+    for day, trades, priced in iter_events(investments, prices):
+        if not trades and not portfolio.holds(priced):
+            continue
+
+        bucket = bucket_of(day)
+        if bucket != period:
+            flush()
+            if end_bucket is not None and bucket > end_bucket:
+                # Later periods are never displayed
+                break
+            period = bucket
+
+        for inv in trades:
+            portfolio.apply(inv)
+        portfolio.reprice(priced)
+        last_day = day
+    else:
+        flush()
+
+    if fill:
+        return fill_periods(result, aggregate_by, start_date, end_date)
+    return [point for _, point in result]
@@ -0,0 +1,93 @@
+"""Streaming export of transactions as CSV or JSON lines."""
+import csv
+import io
+import json
+from datetime import date, datetime
+from enum import Enum
+from typing import AsyncIterator, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.models.investment import Investment, InvestmentType
+
+EXPORT_FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson"
+}
+
+# Exported columns; the InvestmentCreate fields among them can be imported back
+EXPORT_COLUMNS = (
+    "id",
+    "user_id",
+    "name",
+    "symbol",
+    "investment_type",
+    "amount",
+    "purchase_price",
+    "current_price",
+    "purchase_date",
+    "description",
+    "created_at",
+    "updated_at"
+)
+
+# Rows fetched from the server-side cursor per round trip
+EXPORT_BATCH_SIZE = 1000
+
+
+def _plain(value):
+    """Convert a column value to its text-friendly form."""
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def _format_csv(rows) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="\n").writerows(
+        [_plain(value) if value is not None else "" for value in row] for row in rows
+    )
+    return buffer.getvalue()
+
+
+def _format_ndjson(rows) -> str:
+    return "".join(
+        json.dumps({column: _plain(value) for column, value in zip(EXPORT_COLUMNS, row)}) + "\n"
+        for row in rows
+    )
+
+
+async def stream_export(
+    session_factory: async_sessionmaker,
+    format: str,
+    user_id: Optional[int] = None,
+    investment_type: Optional[InvestmentType] = None
+) -> AsyncIterator[str]:
+    """Stream transactions in chronological order, one text chunk per batch.
+
+    Opens its own session, as the stream outlives the request's dependencies.
+    Rows come from a server-side cursor in batches of `EXPORT_BATCH_SIZE`, so
+    memory use does not grow with the size of the history.
+    """
+    query = select(*(getattr(Investment, column) for column in EXPORT_COLUMNS))
+
+    if user_id:
+        query = query.where(Investment.user_id == user_id)
+    if investment_type:
+        query = query.where(Investment.investment_type == investment_type)
+
+    query = query.order_by(Investment.purchase_date, Investment.id).execution_options(
+        yield_per=EXPORT_BATCH_SIZE
+    )
+    format_rows = _format_csv if format == "csv" else _format_ndjson
+
+    if format == "csv":
+        yield ",".join(EXPORT_COLUMNS) + "\n"
+
+    async with session_factory() as db:
+        result = await db.stream(query)
+        async for rows in result.partitions():
+            yield format_rows(rows)
@@ -0,0 +1,127 @@
+"""Bulk import of transactions from CSV or JSON lines."""
+import csv
+import json
+from datetime import datetime
+from typing import AsyncIterator, Iterable, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.investment import Investment
+from app.schemas.investment import InvestmentCreate
+
+IMPORT_FORMATS = ("csv", "ndjson")
+
+# Columns written by an import, in COPY order
+IMPORT_COLUMNS = (
+    "user_id",
+    "name",
+    "symbol",
+    "investment_type",
+    "amount",
+    "purchase_price",
+    "current_price",
+    "purchase_date",
+    "description",
+    "created_at"
+)
+
+# Row errors kept in the response; the rest are only counted
+MAX_REPORTED_ERRORS = 1000
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, str]]:
+    """Split a byte stream into numbered text lines without reading it whole."""
+    buffer = b""
+    line_number = 0
+
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            line_number += 1
+            yield line_number, line.decode("utf-8-sig" if line_number == 1 else "utf-8").rstrip("\r")
+
+    if buffer:
+        yield line_number + 1, buffer.decode("utf-8-sig" if line_number == 0 else "utf-8").rstrip("\r")
+
+
+async def iter_records(chunks: AsyncIterator[bytes], format: str) -> AsyncIterator[Tuple[int, object]]:
+    """Parse a CSV (with a header line) or NDJSON stream into numbered records.
+
+    Blank values are left out of CSV records, so missing required fields are
+    reported as such. Lines that cannot be parsed come back as a `ValueError`
+    in place of the record. CSV records must fit on one line.
+    """
+    header = None
+
+    async for line_number, line in iter_lines(chunks):
+        if not line.strip():
+            continue
+
+        if format == "ndjson":
+            try:
+                yield line_number, json.loads(line)
+            except json.JSONDecodeError as e:
+                yield line_number, ValueError(f"Invalid JSON: {e.msg}")
+            continue
+
+        values = next(csv.reader([line]))
+        if header is None:
+            header = [column.strip() for column in values]
+            continue
+        if len(values) != len(header):
+            yield line_number, ValueError(f"Expected {len(header)} columns, got {len(values)}")
+            continue
+
+        yield line_number, {
+            column: value.strip()
+            for column, value in zip(header, values)
+            if value.strip()
+        }
+
+
+def validate_record(record: object, user_id: Optional[int] = None) -> Tuple[Optional[InvestmentCreate], List[dict]]:
+    """Validate one record as a new transaction, returning it or its errors."""
+    if isinstance(record, ValueError):
+        return None, [{"field": None, "message": str(record)}]
+    if not isinstance(record, dict):
+        return None, [{"field": None, "message": "Expected an object"}]
+
+    if user_id is not None:
+        record = {**record, "user_id": user_id}
+
+    try:
+        return InvestmentCreate.model_validate(record), []
+    except ValidationError as e:
+        return None, [
+            {"field": ".".join(str(part) for part in error["loc"]) or None, "message": error["msg"]}
+            for error in e.errors()
+        ]
+
+
+async def insert_batch(db: AsyncSession, investments: Iterable[InvestmentCreate]) -> None:
+    """Insert validated transactions in one statement, or with COPY on asyncpg."""
+    created_at = datetime.now()
+    rows = [{**investment.model_dump(), "created_at": created_at} for investment in investments]
+    if not rows:
+        return
+
+    if db.get_bind().dialect.driver != "asyncpg":
+        await db.execute(insert(Investment), rows)
+        return
+
+    conn = await db.connection()
+    # The asyncpg adapter opens its transaction on the first statement; COPY must run inside it
+    await conn.exec_driver_sql("SELECT 1")
+    raw_connection = await conn.get_raw_connection()
+    await raw_connection.driver_connection.copy_records_to_table(
+        Investment.__tablename__,
+        columns=IMPORT_COLUMNS,
+        # The enum column stores member names
+        records=[
+            tuple(row[column].name if column == "investment_type" else row[column] for column in IMPORT_COLUMNS)
+            for row in rows
+        ]
+    )
@@ -0,0 +1,217 @@
+"""NumPy kernel for the earnings replay.
+
+A drop-in replacement for `earnings.build_earnings_series` that loads the
+transactions and closes into arrays once. Running sums come from one global
+`cumsum`, positions as of each trade or close from `searchsorted` lookups,
+and the per-period totals from a running sum of each event's change to its
+symbol's contribution, so the cost grows with transactions and closes but
+not with the number of periods. Integer units are summed and multiplied
+like in the pure-Python engine, so the results match it exactly.
+
+The overview is left to `portfolio.summarize_positions`: it runs on one row
+per position, which the database has already aggregated.
+
+NumPy is optional: without it, or with ANALYTICS_KERNEL=python, the
+pure-Python replay is used.
+"""
+from datetime import date
+from math import isqrt
+from typing import Dict, Iterable, List, Optional
+
+from app.config import settings
+from app.services import earnings
+from app.services.earnings import PriceHistory, fill_periods, make_point
+from app.services.periods import format_bucket, get_bucket
+from app.services.units import SCALE, from_units
+
+try:
+    import numpy as np
+except ImportError:  # Optional, only needed for ANALYTICS_KERNEL=numpy
+    np = None
+
+# Ordinal of day 0 of numpy's datetime64
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+# Prices are split into digits of this base so unit products fit in int64
+SPLIT = isqrt(SCALE)
+
+
+def enabled() -> bool:
+    """Check whether the NumPy kernel is selected and installed."""
+    return np is not None and settings.analytics_kernel == "numpy"
+
+
+def _to_units(values):
+    """Vectorized `to_units`."""
+    return np.rint(values * SCALE).astype(np.int64)
+
+
+def _value_units(amounts, prices):
+    """Vectorized `value_units` for non-negative int64 amounts and prices.
+
+    `amount * price` overflows int64 for everyday quantities, so the price is
+    split into its whole part and two `SPLIT` digits of its fraction and the
+    partial products are carried separately. Exact, with the same half-up
+    rounding, while amounts stay below 9.2e18 / SPLIT units and values fit int64.
+    """
+    whole, fraction = np.divmod(prices, SCALE)
+    high, low = np.divmod(fraction, SPLIT)
+    carry, rest = np.divmod(amounts * high, SPLIT)
+    return amounts * whole + carry + (rest * SPLIT + amounts * low + SCALE // 2) // SCALE
+
+
+def _running_sums(values, groups):
+    """Running sums of `values` restarting at every new value of the sorted `groups`.
+
+    One global `cumsum`, minus the total reached before each group starts.
+    """
+    totals = np.cumsum(values)
+    starts = np.flatnonzero(np.r_[True, np.diff(groups) != 0])
+    offsets = totals[starts] - values[starts]
+    return totals - np.repeat(offsets, np.diff(np.r_[starts, len(values)]))
+
+
+def _as_of(keys, values, query_keys, symbol_index, query_symbols, default: float = 0.0):
+    """Look up the last value at or before each query in per-symbol sorted keys.
+
+    Keys combine the symbol index and the day ordinal, so one `searchsorted`
+    serves every symbol; queries before a symbol's first key get `default`.
+    """
+    if not len(keys):
+        return np.full(len(query_keys), default)
+
+    found = np.searchsorted(keys, query_keys, side="right") - 1
+    valid = found >= 0
+    valid[valid] = symbol_index[found[valid]] == query_symbols[valid]
+    return np.where(valid, values[np.maximum(found, 0)], default)
+
+
+def _buckets(day_ordinals, aggregate_by: str):
+    """Vectorized `get_bucket` over date ordinals."""
+    if aggregate_by == "day":
+        return day_ordinals
+    elif aggregate_by == "week":
+        return (day_ordinals - 1) // 7
+
+    days = (day_ordinals - EPOCH_ORDINAL).astype("datetime64[D]")
+    if aggregate_by == "month":
+        return days.astype("datetime64[M]").astype(np.int64) + 1970 * 12
+    else:  # year
+        return days.astype("datetime64[Y]").astype(np.int64) + 1970
+
+
+def build_earnings_series(
+    investments: Iterable,
+    aggregate_by: str,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    prices: Optional[PriceHistory] = None,
+    fill: bool = False
+) -> List[dict]:
+    """Build the cumulative earnings series from transactions sorted by purchase date.
+
+    See `earnings.build_earnings_series`. Net amounts and bought values are
+    running sums of integer units per symbol; a day with only closes counts when one of its
+    symbols is held, and each period is valued as of its last counted day.
+    """
+    if not enabled():
+        return earnings.build_earnings_series(investments, aggregate_by, start_date, end_date, prices, fill)
+
+    investments = list(investments)
+    if not investments:
+        return fill_periods([], aggregate_by, start_date, end_date) if fill else []
+    prices = prices or PriceHistory()
+
+    # Symbols are numbered in first-seen order while their indexes are collected
+    symbol_slots: Dict[str, int] = {}
+    symbol_idx = np.fromiter(
+        (symbol_slots.setdefault(inv.symbol, len(symbol_slots)) for inv in investments),
+        dtype=np.int64, count=len(investments)
+    )
+    symbols = list(symbol_slots)
+    first_day = investments[0].purchase_date
+    # Wide enough that symbol * span + day ordinal never overlaps between symbols
+    span = date.max.toordinal() + 1
+
+    day_ordinals = np.fromiter((inv.purchase_date.toordinal() for inv in investments), np.int64, len(investments))
+    # Amounts and values in integer units, so the running sums are exact
+    amount = _to_units(np.fromiter((inv.amount for inv in investments), float, len(investments)))
+    purchase_price = _to_units(np.fromiter((inv.purchase_price for inv in investments), float, len(investments)))
+    bought = np.where(amount > 0, _value_units(np.maximum(amount, 0), purchase_price), 0)
+
+    # Transactions ordered by (symbol, day); the sort is stable, so each
+    # symbol's running sums add up in the same order as the pure replay
+    order = np.lexsort((day_ordinals, symbol_idx))
+    trade_symbols = symbol_idx[order]
+    trade_keys = trade_symbols * span + day_ordinals[order]
+    net_running = _running_sums(amount[order], trade_symbols)
+    bought_running = _running_sums(bought[order], trade_symbols)
+
+    # Closes of the traded symbols, in the same (symbol, day) key space
+    series = [prices.series(symbol) for symbol in symbols]
+    close_symbols = np.repeat(np.arange(len(symbols)), [len(days) for days, _ in series])
+    close_ordinals = np.fromiter(
+        (day.toordinal() for days, _ in series for day in days), np.int64, len(close_symbols)
+    )
+    close_values = _to_units(np.fromiter((close for _, closes in series for close in closes), float, len(close_symbols)))
+    close_keys = close_symbols * span + close_ordinals
+
+    # Days counted: every trade day, and close days of a held symbol
+    since_first = close_ordinals >= first_day.toordinal()
+    held = _as_of(
+        trade_keys, net_running, close_keys[since_first], trade_symbols, close_symbols[since_first]
+    ) > 0
+    counted_days = np.union1d(day_ordinals, close_ordinals[since_first][held])
+
+    # The last counted day of each period values the period
+    start_bucket = get_bucket(start_date, aggregate_by) if start_date and not fill else None
+    end_bucket = get_bucket(end_date, aggregate_by) if end_date else None
+    buckets = _buckets(counted_days, aggregate_by)
+    last_of_period = np.flatnonzero(np.r_[np.diff(buckets) != 0, True])
+    if start_bucket is not None:
+        last_of_period = last_of_period[buckets[last_of_period] >= start_bucket]
+    if end_bucket is not None:
+        last_of_period = last_of_period[buckets[last_of_period] <= end_bucket]
+    if not len(last_of_period):
+        return fill_periods([], aggregate_by, start_date, end_date) if fill else []
+
+    # Every (symbol, day) a position can change its contribution on: trades and closes
+    event_keys = np.union1d(trade_keys, close_keys)
+    event_symbols, event_days = np.divmod(event_keys, span)
+    net_amount = _as_of(trade_keys, net_running, event_keys, trade_symbols, event_symbols, 0)
+    bought_value = _as_of(trade_keys, bought_running, event_keys, trade_symbols, event_symbols, 0)
+    close = _as_of(close_keys, close_values, event_keys, close_symbols, event_symbols, 0)
+
+    # Only active positions count; positions without a close are valued at cost
+    active = net_amount > 0
+    contributions = np.stack([
+        np.where(active, bought_value, 0),
+        np.where(active, np.where(close != 0, _value_units(np.maximum(net_amount, 0), close), bought_value), 0),
+        active,
+        np.where(active, net_amount, 0)
+    ])
+
+    # Each event replaces its symbol's previous contribution, so the portfolio
+    # totals on a day are the running sum of the changes up to that day
+    changes = np.diff(contributions, axis=1, prepend=0)
+    first_events = np.r_[True, np.diff(event_symbols) != 0]
+    changes[:, first_events] = contributions[:, first_events]
+    by_day = np.argsort(event_days, kind="stable")
+    totals = np.cumsum(changes[:, by_day], axis=1)
+    valuation_days = counted_days[last_of_period]
+    invested, current_value, counts, amounts = totals[
+        :, np.searchsorted(event_days[by_day], valuation_days, side="right") - 1
+    ]
+
+    result = [
+        (bucket, make_point(
+            format_bucket(bucket, aggregate_by), from_units(int(point_invested)), from_units(int(point_value)),
+            int(count), from_units(int(point_amount))
+        ))
+        for bucket, point_invested, point_value, count, point_amount in zip(
+            buckets[last_of_period].tolist(), invested, current_value, counts, amounts
+        )
+    ]
+
+    if fill:
+        return fill_periods(result, aggregate_by, start_date, end_date)
+    return [point for _, point in result]
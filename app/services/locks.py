@@ -0,0 +1,28 @@
+"""In-process locks for databases without row-level locking."""
+import asyncio
+from contextlib import nullcontext
+from typing import AsyncContextManager, Optional, Tuple
+from weakref import WeakValueDictionary
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Locks are dropped once no coroutine holds or waits for them
+_position_locks: "WeakValueDictionary[Tuple[Optional[int], str], asyncio.Lock]" = WeakValueDictionary()
+
+
+def position_lock(db: AsyncSession, user_id: Optional[int], symbol: str) -> AsyncContextManager:
+    """Serialize writes to one user's position in a symbol within this process.
+
+    Only needed on SQLite, which ignores SELECT ... FOR UPDATE; other
+    databases serialize through the row locks taken by `lock_positions`,
+    which also hold across processes. Sells of the same symbol by other
+    users do not wait for each other.
+    """
+    if db.get_bind().dialect.name != "sqlite":
+        return nullcontext()
+
+    key = (user_id, symbol)
+    lock = _position_locks.get(key)
+    if lock is None:
+        lock = _position_locks[key] = asyncio.Lock()
+    return lock
@@ -0,0 +1,258 @@
+"""FIFO and LIFO lot matching and maintenance of the persisted open lots.
+
+Every buy opens a lot; a sell closes the oldest (FIFO) or the newest (LIFO)
+open lots first, and its realized P/L is the sale value minus the cost of
+the lots it closed. Both methods are kept side by side on the same lot rows
+and ledger rows, so either can be read without replaying the history.
+Average-cost figures come from the ledger sums alone and need no lots.
+
+Matching runs in integer units (see `app.services.units`); quantities and
+money are converted from the rows on load and back when they are written.
+"""
+from collections import deque
+from datetime import date
+from itertools import groupby
+from operator import attrgetter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.models.investment import Investment
+from app.models.lot import Lot
+from app.models.position import Position
+from app.services.units import from_units, prorate_units, to_units, value_units
+
+COST_BASIS_METHODS = ("avg", "fifo", "lifo")
+
+# Methods that match sells against individual lots
+LOT_METHODS = ("fifo", "lifo")
+
+# Open lots loaded per query while a sell consumes them
+LOT_BATCH_SIZE = 50
+
+
+class LotBook:
+    """Open lots of one position under one matching method.
+
+    Lots are kept as [investment_id, opened_on, price, remaining] in the
+    order they were bought, in a deque that a sell consumes from the front
+    (FIFO) or the back (LIFO), so each sell costs O(lots consumed). Any part
+    of a sell beyond the open lots is matched at the average buy price.
+    Amounts, prices and totals are integer units.
+    """
+
+    def __init__(self, method: str):
+        self.method = method
+        self.lots = deque()
+        self.realized = 0
+        self.open_cost = 0
+
+    def buy(self, investment_id: int, opened_on: date, amount: int, price: int) -> None:
+        self.lots.append([investment_id, opened_on, price, amount])
+        self.open_cost += value_units(amount, price)
+
+    def sell(self, amount: int, price: int, bought_amount: int, bought_value: int) -> None:
+        sale_value = value_units(amount, price)
+        cost = 0
+
+        while amount > 0 and self.lots:
+            lot = self.lots[0] if self.method == "fifo" else self.lots[-1]
+            taken = min(amount, lot[3])
+            lot[3] -= taken
+            cost += value_units(taken, lot[2])
+            amount -= taken
+
+            if lot[3] <= 0:
+                if self.method == "fifo":
+                    self.lots.popleft()
+                else:
+                    self.lots.pop()
+
+        self.open_cost -= cost
+        self.realized += sale_value - cost - _average_cost(amount, bought_amount, bought_value)
+
+
+def _average_cost(amount: int, bought_amount: int, bought_value: int) -> int:
+    """Get the cost of `amount` at the average buy price, in units."""
+    return prorate_units(bought_value, amount, bought_amount) if bought_amount > 0 else 0
+
+
+def has_later_transactions(db: Session, investment: Investment) -> bool:
+    """Check whether the position already has a transaction dated after this one."""
+    return db.query(Investment.id).filter(
+        Investment.user_id == investment.user_id,
+        Investment.symbol == investment.symbol,
+        Investment.purchase_date > investment.purchase_date
+    ).first() is not None
+
+
+def open_lot(db: Session, position: Position, investment: Investment) -> None:
+    """Open a lot for a buy dated after every other transaction of its position."""
+    db.flush()
+    db.add(Lot(
+        user_id=investment.user_id,
+        symbol=investment.symbol,
+        investment_id=investment.id,
+        opened_on=investment.purchase_date,
+        price=investment.purchase_price,
+        fifo_remaining=investment.amount,
+        lifo_remaining=investment.amount
+    ))
+
+    cost = value_units(to_units(investment.amount), to_units(investment.purchase_price))
+    position.fifo_open_cost = from_units(to_units(position.fifo_open_cost) + cost)
+    position.lifo_open_cost = from_units(to_units(position.lifo_open_cost) + cost)
+
+
+def _consume(db: Session, investment: Investment, method: str, amount: int) -> Tuple[int, int, List[Lot]]:
+    """Close `amount` units of the open lots in matching order.
+
+    Returns the cost of the closed part and the amount left unmatched, in
+    units, and the lots touched. Lots are loaded in small batches; the changes are flushed
+    before each batch, so closed lots drop out of the next one.
+    """
+    remaining = getattr(Lot, f"{method}_remaining")
+    order = (Lot.opened_on, Lot.investment_id) if method == "fifo" else (Lot.opened_on.desc(), Lot.investment_id.desc())
+    query = db.query(Lot).filter(
+        Lot.user_id == investment.user_id,
+        Lot.symbol == investment.symbol,
+        remaining > 0
+    ).order_by(*order).limit(LOT_BATCH_SIZE)
+
+    cost = 0
+    touched = []
+
+    while amount > 0:
+        db.flush()
+        batch = query.all()
+        if not batch:
+            break
+
+        for lot in batch:
+            lot_remaining = to_units(getattr(lot, remaining.key))
+            taken = min(amount, lot_remaining)
+            setattr(lot, remaining.key, from_units(lot_remaining - taken))
+            cost += value_units(taken, to_units(lot.price))
+            amount -= taken
+            touched.append(lot)
+
+            if amount <= 0:
+                break
+
+    return cost, amount, touched
+
+
+def close_lots(db: Session, position: Position, investment: Investment) -> None:
+    """Match a sell dated after every other transaction of its position against the open lots."""
+    amount = -to_units(investment.amount)
+    sale_value = value_units(amount, to_units(investment.purchase_price))
+    bought_amount = to_units(position.bought_amount)
+    bought_value = to_units(position.total_bought_value)
+    touched = set()
+
+    for method in LOT_METHODS:
+        cost, unmatched, lots = _consume(db, investment, method, amount)
+        touched.update(lots)
+
+        realized = to_units(getattr(position, f"{method}_realized")) + sale_value - cost
+        realized -= _average_cost(unmatched, bought_amount, bought_value)
+        setattr(position, f"{method}_realized", from_units(realized))
+        setattr(position, f"{method}_open_cost", from_units(to_units(getattr(position, f"{method}_open_cost")) - cost))
+
+    for lot in touched:
+        if lot.fifo_remaining <= 0 and lot.lifo_remaining <= 0:
+            db.delete(lot)
+
+
+def _replay(db: Session, position: Position, investments: Iterable[Investment]) -> None:
+    """Match a position's transactions in date order and write its open lots and totals."""
+    books = {method: LotBook(method) for method in LOT_METHODS}
+    bought_amount = 0
+    bought_value = 0
+
+    for inv in investments:
+        amount = to_units(inv.amount)
+        price = to_units(inv.purchase_price)
+        if amount > 0:  # Buy transaction
+            bought_amount += amount
+            bought_value += value_units(amount, price)
+            for book in books.values():
+                book.buy(inv.id, inv.purchase_date, amount, price)
+        else:  # Sell transaction (negative amount)
+            for book in books.values():
+                book.sell(-amount, price, bought_amount, bought_value)
+
+    # One row per lot still open under either method
+    open_lots: Dict[int, dict] = {}
+    for method, book in books.items():
+        for investment_id, opened_on, price, remaining in book.lots:
+            lot = open_lots.setdefault(investment_id, {
+                "user_id": position.user_id,
+                "symbol": position.symbol,
+                "investment_id": investment_id,
+                "opened_on": opened_on,
+                "price": from_units(price),
+                "fifo_remaining": 0.0,
+                "lifo_remaining": 0.0
+            })
+            lot[f"{method}_remaining"] = from_units(remaining)
+
+        setattr(position, f"{method}_realized", from_units(book.realized))
+        setattr(position, f"{method}_open_cost", from_units(book.open_cost))
+
+    if open_lots:
+        db.execute(insert(Lot), list(open_lots.values()))
+
+
+def replay_lots(db: Session, position: Position) -> None:
+    """Rebuild one position's open lots and lot-matched totals from its transactions.
+
+    Pending changes are flushed first so the replay sees them.
+    """
+    db.flush()
+    delete_lots(db, position.user_id, position.symbol)
+
+    investments = db.query(Investment).filter(
+        Investment.user_id == position.user_id,
+        Investment.symbol == position.symbol
+    ).order_by(Investment.purchase_date, Investment.id)
+
+    _replay(db, position, investments)
+
+
+def delete_lots(db: Session, user_id: Optional[int], symbol: str) -> None:
+    """Remove the open lots of a position."""
+    db.query(Lot).filter(
+        Lot.user_id == user_id,
+        Lot.symbol == symbol
+    ).delete(synchronize_session=False)
+
+
+def rebuild_lots(db: Session, user_id: Optional[int] = None) -> None:
+    """Regenerate the open lots and lot-matched totals of every ledger position.
+
+    Rebuilds every user when `user_id` is not given; expects the ledger rows
+    to exist already.
+    """
+    lots = db.query(Lot)
+    positions = db.query(Position)
+    investments = db.query(Investment)
+
+    if user_id is not None:
+        lots = lots.filter(Lot.user_id == user_id)
+        positions = positions.filter(Position.user_id == user_id)
+        investments = investments.filter(Investment.user_id == user_id)
+
+    lots.delete(synchronize_session=False)
+    ledger = {(position.user_id, position.symbol): position for position in positions}
+
+    investments = investments.order_by(
+        Investment.user_id,
+        Investment.symbol,
+        Investment.purchase_date,
+        Investment.id
+    ).yield_per(1000)
+
+    for key, position_investments in groupby(investments, key=attrgetter("user_id", "symbol")):
+        _replay(db, ledger[key], position_investments)
@@ -0,0 +1,24 @@
+"""Opaque cursors for keyset pagination."""
+import base64
+import json
+from datetime import date
+from typing import Tuple
+
+
+def encode_cursor(purchase_date: date, investment_id: int) -> str:
+    """Encode the sort key of the last row of a page."""
+    payload = json.dumps([purchase_date.isoformat(), investment_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[date, int]:
+    """Decode a cursor back to its (purchase_date, id) sort key.
+
+    Raises ValueError for cursors that were not produced by `encode_cursor`.
+    """
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        purchase_date, investment_id = json.loads(payload)
+        return date.fromisoformat(purchase_date), int(investment_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
@@ -0,0 +1,70 @@
+"""Calendar periods the earnings series is aggregated by.
+
+Periods are numbered with integer bucket ordinals, so the series is grouped,
+compared and stepped with integer arithmetic; labels are only formatted for
+the points that are returned.
+
+- day: the date's ordinal
+- week: weeks since Monday 0001-01-01 (the ISO week of that Monday)
+- month: year * 12 + month - 1
+- year: the year
+"""
+from datetime import date, timedelta
+from operator import attrgetter
+from typing import Callable, Tuple
+
+BUCKET_FUNCTIONS = {
+    "day": date.toordinal,
+    "week": lambda day: (day.toordinal() - 1) // 7,
+    "month": lambda day: day.year * 12 + day.month - 1,
+    "year": attrgetter("year")
+}
+
+
+def bucket_function(aggregate_by: str) -> Callable[[date], int]:
+    """Get the function mapping a date to its period ordinal, to look up once per series."""
+    return BUCKET_FUNCTIONS[aggregate_by]
+
+
+def get_bucket(day: date, aggregate_by: str) -> int:
+    """Get the ordinal of the period a date falls into."""
+    return BUCKET_FUNCTIONS[aggregate_by](day)
+
+
+def bucket_start(bucket: int, aggregate_by: str) -> date:
+    """Get the first day of a period ordinal."""
+    if aggregate_by == "day":
+        return date.fromordinal(bucket)
+    elif aggregate_by == "week":
+        return date.fromordinal(bucket * 7 + 1)
+    elif aggregate_by == "month":
+        return date(bucket // 12, bucket % 12 + 1, 1)
+    else:  # year
+        return date(bucket, 1, 1)
+
+
+def format_bucket(bucket: int, aggregate_by: str) -> str:
+    """Get the label of a period ordinal."""
+    if aggregate_by == "day":
+        return date.fromordinal(bucket).isoformat()
+    elif aggregate_by == "week":
+        year, week, _ = date.fromordinal(bucket * 7 + 1).isocalendar()
+        return f"{year}-W{week:02d}"
+    elif aggregate_by == "month":
+        return f"{bucket // 12:04d}-{bucket % 12 + 1:02d}"
+    else:  # year
+        return str(bucket)
+
+
+def get_period_bounds(day: date, aggregate_by: str) -> Tuple[date, date]:
+    """Get the first and last day of the period a date falls into."""
+    if aggregate_by == "day":
+        return day, day
+    elif aggregate_by == "week":
+        start = day - timedelta(days=day.weekday())
+        return start, start + timedelta(days=6)
+    elif aggregate_by == "month":
+        start = day.replace(day=1)
+        return start, (start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+    else:  # year
+        return date(day.year, 1, 1), date(day.year, 12, 31)
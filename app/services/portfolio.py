@@ -0,0 +1,186 @@
+"""Per-symbol position aggregation and the portfolio overview summary."""
+from operator import attrgetter
+from typing import Dict, Iterable
+
+from sqlalchemy import Select, case, func, select
+
+from app.models.investment import Investment
+from app.models.price import Price
+from app.services.units import from_units, prorate_units, to_units, value_units
+
+# Position sums `collect_positions` accumulates in integer units
+SUM_KEYS = ("bought_amount", "sold_amount", "total_bought_value", "total_sold_value")
+
+
+def position_totals_query(*filters, per_user: bool = False, with_price: bool = False) -> Select:
+    """Build the query that aggregates transactions into one row per position.
+
+    A single GROUP BY splits buys and sells with conditional sums, while window
+    functions pick the name and investment type of the first transaction of
+    every position. Positions are keyed by symbol, or by (user_id, symbol) with
+    `per_user`, and come back in the order they were first traded. With
+    `with_price` the current price is joined from the prices table.
+    """
+    partition_by = [Investment.user_id, Investment.symbol] if per_user else [Investment.symbol]
+    ordered = select(
+        Investment.id,
+        Investment.user_id,
+        Investment.symbol,
+        Investment.amount,
+        Investment.purchase_price,
+        func.first_value(Investment.name, type_=Investment.name.type).over(
+            partition_by=partition_by,
+            order_by=Investment.id
+        ).label("name"),
+        func.first_value(Investment.investment_type, type_=Investment.investment_type.type).over(
+            partition_by=partition_by,
+            order_by=Investment.id
+        ).label("investment_type")
+    ).where(*filters).subquery()
+
+    keys = [ordered.c.user_id, ordered.c.symbol] if per_user else [ordered.c.symbol]
+    is_buy = ordered.c.amount > 0
+
+    query = select(
+        *keys,
+        ordered.c.name,
+        ordered.c.investment_type,
+        func.sum(case((is_buy, ordered.c.amount), else_=0)).label("bought_amount"),
+        func.sum(case((is_buy, 0), else_=-ordered.c.amount)).label("sold_amount"),
+        func.sum(case((is_buy, ordered.c.amount * ordered.c.purchase_price), else_=0)).label("total_bought_value"),
+        func.sum(case((is_buy, 0), else_=-ordered.c.amount * ordered.c.purchase_price)).label("total_sold_value")
+    ).group_by(
+        *keys,
+        ordered.c.name,
+        ordered.c.investment_type
+    ).order_by(func.min(ordered.c.id))
+
+    if with_price:
+        query = query.add_columns(Price.price.label("current_price")).outerjoin(
+            Price, Price.symbol == ordered.c.symbol
+        ).group_by(Price.price)
+
+    return query
+
+
+def collect_positions(investments: Iterable[Investment], prices: Dict[str, float]) -> Dict[str, dict]:
+    """Aggregate already loaded transactions into one position per symbol.
+
+    The in-memory counterpart of the positions ledger: name and investment
+    type come from the first transaction, the current price from `prices`,
+    and positions keep the order they were first traded in. Each position
+    also carries its `name`. Sums are taken in integer units and converted
+    back to floats at the end.
+    """
+    positions = {}
+
+    for inv in sorted(investments, key=attrgetter("id")):
+        pos = positions.get(inv.symbol)
+        if pos is None:
+            pos = positions[inv.symbol] = {
+                "name": inv.name,
+                "investment_type": inv.investment_type,
+                "bought_amount": 0,
+                "sold_amount": 0,
+                "total_bought_value": 0,
+                "total_sold_value": 0,
+                "current_price": prices.get(inv.symbol)
+            }
+
+        amount = to_units(inv.amount)
+        value = value_units(abs(amount), to_units(inv.purchase_price))
+        if amount > 0:  # Buy transaction
+            pos["bought_amount"] += amount
+            pos["total_bought_value"] += value
+        else:  # Sell transaction (negative amount)
+            pos["sold_amount"] -= amount
+            pos["total_sold_value"] += value
+
+    for pos in positions.values():
+        for key in SUM_KEYS:
+            pos[key] = from_units(pos[key])
+
+    return positions
+
+
+def summarize_positions(positions: Dict[str, dict]) -> dict:
+    """Summarize per-symbol positions into the portfolio overview.
+
+    Calculates unrealized profit for the remaining holdings and realized profit
+    for the sold part of each position, both against the average buy price.
+    Positions that carry `open_cost` and `realized_profit_loss` (see
+    `load_positions`) use those lot-matched figures instead. Totals are
+    summed in integer units and converted back to floats at the end.
+    """
+    total_invested = 0
+    total_current_value = 0
+    realized_profit_loss = 0
+    active_positions = 0
+    by_type = {}
+
+    for symbol, pos in positions.items():
+        bought_amount = to_units(pos["bought_amount"])
+        sold_amount = to_units(pos["sold_amount"])
+        total_bought_value = to_units(pos["total_bought_value"])
+        net_amount = bought_amount - sold_amount
+
+        lot_matched = "open_cost" in pos
+
+        # Calculate realized P/L from sales, against the average purchase price
+        if lot_matched:
+            realized_profit_loss += to_units(pos["realized_profit_loss"])
+        elif sold_amount > 0:
+            cost_of_sold = prorate_units(total_bought_value, sold_amount, bought_amount) if bought_amount > 0 else 0
+            realized_profit_loss += to_units(pos["total_sold_value"]) - cost_of_sold
+
+        # Calculate unrealized P/L for remaining position
+        if net_amount > 0:
+            if lot_matched:
+                position_cost = to_units(pos["open_cost"])
+            else:
+                position_cost = prorate_units(total_bought_value, net_amount, bought_amount)
+            # Positions without a current price are valued at cost
+            if pos["current_price"]:
+                position_current_value = value_units(net_amount, to_units(pos["current_price"]))
+            else:
+                position_current_value = position_cost
+
+            total_invested += position_cost
+            total_current_value += position_current_value
+            active_positions += 1
+
+            # Group by type
+            type_key = pos["investment_type"].value
+            if type_key not in by_type:
+                by_type[type_key] = {
+                    "count": 0,
+                    "invested": 0,
+                    "current_value": 0
+                }
+
+            by_type[type_key]["count"] += 1
+            by_type[type_key]["invested"] += position_cost
+            by_type[type_key]["current_value"] += position_current_value
+
+    unrealized_profit_loss = from_units(total_current_value - total_invested)
+    total_profit_loss = from_units(total_current_value - total_invested + realized_profit_loss)
+    profit_loss_percentage = (total_profit_loss / from_units(total_invested) * 100) if total_invested > 0 else 0
+
+    return {
+        "total_investments": active_positions,
+        "total_invested": round(from_units(total_invested), 2),
+        "total_current_value": round(from_units(total_current_value), 2),
+        "unrealized_profit_loss": round(unrealized_profit_loss, 2),
+        "realized_profit_loss": round(from_units(realized_profit_loss), 2),
+        "total_profit_loss": round(total_profit_loss, 2),
+        "profit_loss_percentage": round(profit_loss_percentage, 2),
+        "by_type": {
+            type_key: {
+                "count": totals["count"],
+                "invested": from_units(totals["invested"]),
+                "current_value": from_units(totals["current_value"]),
+                "profit_loss": from_units(totals["current_value"] - totals["invested"])
+            }
+            for type_key, totals in by_type.items()
+        }
+    }
@@ -0,0 +1,254 @@
+"""Maintenance and reads of the materialized positions ledger."""
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import Session
+
+from app.models.investment import Investment, InvestmentType
+from app.models.position import Position
+from app.models.price import Price
+from app.services.lots import (
+    LOT_METHODS,
+    close_lots,
+    delete_lots,
+    has_later_transactions,
+    open_lot,
+    rebuild_lots,
+    replay_lots
+)
+from app.services.portfolio import position_totals_query
+from app.services.units import from_units, to_units, value_units
+
+LEDGER_COLUMNS = (
+    "user_id",
+    "symbol",
+    "name",
+    "investment_type",
+    "bought_amount",
+    "sold_amount",
+    "total_bought_value",
+    "total_sold_value"
+)
+
+
+def get_position(db: Session, user_id: Optional[int], symbol: str) -> Optional[Position]:
+    """Get the ledger row of a position."""
+    return db.query(Position).filter(
+        Position.user_id == user_id,
+        Position.symbol == symbol
+    ).first()
+
+
+def lock_positions(db: Session, user_id: Optional[int], symbol: str) -> List[Position]:
+    """Get and lock the ledger rows of a symbol until the transaction ends.
+
+    Covers one user's position, or every user's when `user_id` is not given.
+    Concurrent writers to the same rows wait for the lock, so a check made
+    on the returned rows still holds when the transaction commits.
+    """
+    query = db.query(Position).filter(Position.symbol == symbol)
+
+    if user_id:
+        query = query.filter(Position.user_id == user_id)
+
+    return query.order_by(Position.id).with_for_update().all()
+
+
+def apply_transaction(db: Session, investment: Investment) -> Position:
+    """Add a new transaction to its position.
+
+    Changes to existing transactions go through `recompute_position`. Lots
+    are matched in date order, so a transaction dated before others of the
+    position replays its lots; otherwise it opens or closes lots in place.
+    """
+    position = get_position(db, investment.user_id, investment.symbol)
+    if position is None:
+        position = Position(
+            user_id=investment.user_id,
+            symbol=investment.symbol,
+            name=investment.name,
+            investment_type=investment.investment_type,
+            bought_amount=0,
+            sold_amount=0,
+            total_bought_value=0,
+            total_sold_value=0,
+            fifo_realized=0,
+            fifo_open_cost=0,
+            lifo_realized=0,
+            lifo_open_cost=0
+        )
+        db.add(position)
+
+    # Added in integer units, like the lots
+    amount = to_units(investment.amount)
+    value = value_units(abs(amount), to_units(investment.purchase_price))
+    if amount > 0:  # Buy transaction
+        position.bought_amount = from_units(to_units(position.bought_amount) + amount)
+        position.total_bought_value = from_units(to_units(position.total_bought_value) + value)
+    else:  # Sell transaction (negative amount)
+        position.sold_amount = from_units(to_units(position.sold_amount) - amount)
+        position.total_sold_value = from_units(to_units(position.total_sold_value) + value)
+
+    if has_later_transactions(db, investment):
+        replay_lots(db, position)
+    elif investment.amount > 0:
+        open_lot(db, position, investment)
+    else:
+        close_lots(db, position, investment)
+
+    return position
+
+
+def recompute_position(db: Session, user_id: Optional[int], symbol: str) -> Optional[Position]:
+    """Recompute one position from its transactions.
+
+    Removes the ledger row once the position has no transactions left.
+    Pending changes are flushed first so the aggregate sees them.
+    """
+    db.flush()
+
+    totals = db.execute(position_totals_query(
+        Investment.user_id == user_id,
+        Investment.symbol == symbol
+    )).first()
+    position = get_position(db, user_id, symbol)
+
+    if totals is None:
+        if position is not None:
+            db.delete(position)
+        delete_lots(db, user_id, symbol)
+        return None
+
+    if position is None:
+        position = Position(user_id=user_id, symbol=symbol)
+        db.add(position)
+
+    for column in LEDGER_COLUMNS[2:]:
+        setattr(position, column, getattr(totals, column))
+    replay_lots(db, position)
+
+    return position
+
+
+def rebuild_positions(db: Session, user_id: Optional[int] = None) -> int:
+    """Regenerate the ledger and its open lots from the raw transaction log.
+
+    Rebuilds every user when `user_id` is not given. Returns the number of
+    positions written.
+    """
+    positions = db.query(Position)
+    filters = []
+
+    if user_id is not None:
+        positions = positions.filter(Position.user_id == user_id)
+        filters.append(Investment.user_id == user_id)
+
+    positions.delete(synchronize_session=False)
+
+    # The aggregate selects its columns in ledger order
+    result = db.execute(insert(Position).from_select(
+        LEDGER_COLUMNS,
+        position_totals_query(*filters, per_user=True)
+    ))
+    rebuild_lots(db, user_id)
+    return result.rowcount
+
+
+def query_positions(
+    db: Session,
+    user_id: int,
+    investment_type: Optional[InvestmentType] = None,
+    open_only: bool = False
+) -> List[Tuple[Position, Optional[float]]]:
+    """Get a user's ledger rows with their current price, in the order they were first traded."""
+    query = db.query(Position, Price.price).outerjoin(
+        Price, Price.symbol == Position.symbol
+    ).filter(Position.user_id == user_id)
+
+    if investment_type:
+        query = query.filter(Position.investment_type == investment_type)
+    if open_only:
+        query = query.filter(Position.bought_amount - Position.sold_amount > 0)
+
+    return query.order_by(Position.id).all()
+
+
+def load_positions(
+    db: Session,
+    user_id: int,
+    investment_type: Optional[InvestmentType] = None,
+    cost_basis_method: str = "avg"
+) -> Dict[str, dict]:
+    """Get a user's positions keyed by symbol, in the shape `summarize_positions` takes.
+
+    With a lot matching method, each position also carries the cost of its
+    open lots and its realized P/L under that method.
+    """
+    positions = {}
+
+    for position, current_price in query_positions(db, user_id, investment_type):
+        pos = positions[position.symbol] = {
+            "investment_type": position.investment_type,
+            "bought_amount": position.bought_amount,
+            "sold_amount": position.sold_amount,
+            "total_bought_value": position.total_bought_value,
+            "total_sold_value": position.total_sold_value,
+            "current_price": current_price
+        }
+        if cost_basis_method in LOT_METHODS:
+            pos["open_cost"] = getattr(position, f"{cost_basis_method}_open_cost")
+            pos["realized_profit_loss"] = getattr(position, f"{cost_basis_method}_realized")
+
+    return positions
+
+
+def aggregate_ledger(
+    db: Session,
+    cost_basis_method: str = "avg",
+    investment_type: Optional[InvestmentType] = None
+) -> Dict[str, dict]:
+    """Sum every user's ledger rows into one position per symbol, in the shape of `load_positions`.
+
+    Reads one row per (user, symbol) position instead of the transactions.
+    Lots are matched per user, so with a lot matching method the all-users
+    view adds up the users' lot-matched totals. Name and investment type come
+    from the first ledger row of each symbol, like in `position_totals_query`.
+    """
+    filters = []
+    if investment_type:
+        filters.append(Position.investment_type == investment_type)
+
+    ordered = select(
+        Position,
+        func.first_value(Position.investment_type, type_=Position.investment_type.type).over(
+            partition_by=Position.symbol,
+            order_by=Position.id
+        ).label("first_type")
+    ).where(*filters).subquery()
+
+    query = select(
+        ordered.c.symbol,
+        ordered.c.first_type.label("investment_type"),
+        func.sum(ordered.c.bought_amount).label("bought_amount"),
+        func.sum(ordered.c.sold_amount).label("sold_amount"),
+        func.sum(ordered.c.total_bought_value).label("total_bought_value"),
+        func.sum(ordered.c.total_sold_value).label("total_sold_value"),
+        Price.price.label("current_price")
+    ).outerjoin(
+        Price, Price.symbol == ordered.c.symbol
+    ).group_by(
+        ordered.c.symbol,
+        ordered.c.first_type,
+        Price.price
+    ).order_by(func.min(ordered.c.id))
+
+    if cost_basis_method in LOT_METHODS:
+        query = query.add_columns(
+            func.sum(ordered.c[f"{cost_basis_method}_open_cost"]).label("open_cost"),
+            func.sum(ordered.c[f"{cost_basis_method}_realized"]).label("realized_profit_loss")
+        )
+
+    return {
+        row.symbol: {column: value for column, value in row._mapping.items() if column != "symbol"}
+        for row in db.execute(query)
+    }
@@ -0,0 +1,138 @@
+"""Writes and reads of the current prices and the daily price history."""
+import csv
+from datetime import date
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.models.price import HistoricalPrice, Price
+from app.services.earnings import PriceHistory
+
+UPSERT_DIALECTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
+def upsert_prices(db: Session, prices: Dict[str, float]) -> None:
+    """Set the current price of each symbol with a single INSERT ... ON CONFLICT."""
+    if not prices:
+        return
+
+    insert = UPSERT_DIALECTS[db.get_bind().dialect.name]
+    statement = insert(Price).values([
+        {"symbol": symbol, "price": price, "as_of": func.now()}
+        for symbol, price in prices.items()
+    ])
+    db.execute(statement.on_conflict_do_update(
+        index_elements=[Price.symbol],
+        set_={"price": statement.excluded.price, "as_of": statement.excluded.as_of}
+    ))
+
+
+def set_price(db: Session, symbol: str, price: Optional[float]) -> None:
+    """Record a price entered with a transaction, if it has one."""
+    if price:
+        upsert_prices(db, {symbol: price})
+
+
+def update_prices(db: Session, prices: Dict[str, float]) -> int:
+    """Apply a batch of price quotes and return how many symbols changed price.
+
+    All quotes are written, so `as_of` moves for unchanged prices too; new
+    symbols count as changed.
+    """
+    current = get_prices(db, prices.keys())
+    upsert_prices(db, prices)
+    return sum(1 for symbol, price in prices.items() if current.get(symbol) != price)
+
+
+def get_prices(db: Session, symbols: Optional[Iterable[str]] = None) -> Dict[str, float]:
+    """Get current prices keyed by symbol, for all symbols or the given ones."""
+    query = select(Price.symbol, Price.price)
+
+    if symbols is not None:
+        query = query.where(Price.symbol.in_(list(symbols)))
+
+    return dict(db.execute(query).all())
+
+
+def record_closes(db: Session, closes: Dict[Tuple[str, date], float]) -> None:
+    """Write daily closes keyed by (symbol, day), replacing existing ones."""
+    if not closes:
+        return
+
+    insert = UPSERT_DIALECTS[db.get_bind().dialect.name]
+    statement = insert(HistoricalPrice).values([
+        {"symbol": symbol, "day": day, "close": close}
+        for (symbol, day), close in closes.items()
+    ])
+    db.execute(statement.on_conflict_do_update(
+        index_elements=[HistoricalPrice.symbol, HistoricalPrice.day],
+        set_={"close": statement.excluded.close}
+    ))
+
+
+def record_entered_closes(db: Session, closes: Dict[Tuple[str, date], float]) -> Dict[str, date]:
+    """Write prices entered with transactions as closes of days that have none.
+
+    Closes from quotes and price files take priority over a price typed in
+    with a transaction, so existing closes are kept. Returns the earliest
+    written day per symbol.
+    """
+    if not closes:
+        return {}
+
+    insert = UPSERT_DIALECTS[db.get_bind().dialect.name]
+    statement = insert(HistoricalPrice).values([
+        {"symbol": symbol, "day": day, "close": close}
+        for (symbol, day), close in closes.items()
+    ]).on_conflict_do_nothing(
+        index_elements=[HistoricalPrice.symbol, HistoricalPrice.day]
+    ).returning(HistoricalPrice.symbol, HistoricalPrice.day)
+
+    since_by_symbol: Dict[str, date] = {}
+    for symbol, day in db.execute(statement):
+        if symbol not in since_by_symbol or day < since_by_symbol[symbol]:
+            since_by_symbol[symbol] = day
+    return since_by_symbol
+
+
+def load_price_history(db: Session, symbols: Iterable[str]) -> PriceHistory:
+    """Load the daily closes of the given symbols for as-of valuation."""
+    symbols = list(symbols)
+    if not symbols:
+        return PriceHistory()
+
+    return PriceHistory(db.execute(
+        select(HistoricalPrice.symbol, HistoricalPrice.day, HistoricalPrice.close).where(
+            HistoricalPrice.symbol.in_(symbols)
+        ).order_by(HistoricalPrice.symbol, HistoricalPrice.day)
+    ).all())
+
+
+def load_closes_csv(db: Session, lines: Iterable[str], chunk_size: int = 5000) -> Tuple[int, Dict[str, date]]:
+    """Load daily closes from CSV lines with a `symbol,day,close` header.
+
+    Writes in chunks of `chunk_size` rows. Returns the number of closes read
+    and the earliest loaded day per symbol.
+    """
+    count = 0
+    since_by_symbol: Dict[str, date] = {}
+    chunk: Dict[Tuple[str, date], float] = {}
+
+    for row in csv.DictReader(lines):
+        symbol, day, close = row["symbol"].strip(), date.fromisoformat(row["day"].strip()), float(row["close"])
+        chunk[symbol, day] = close
+        count += 1
+        if symbol not in since_by_symbol or day < since_by_symbol[symbol]:
+            since_by_symbol[symbol] = day
+
+        if len(chunk) >= chunk_size:
+            record_closes(db, chunk)
+            chunk = {}
+
+    record_closes(db, chunk)
+    return count, since_by_symbol
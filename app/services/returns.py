@@ -0,0 +1,184 @@
+"""Time-weighted and money-weighted returns from the transaction cash flows."""
+import math
+from bisect import bisect_left, bisect_right
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from app.services.earnings import PriceHistory, iter_events
+from app.services.units import from_units, to_units, value_units
+
+try:
+    import numpy as np
+except ImportError:  # Optional, the sub-period chain falls back to a loop
+    np = None
+
+DAYS_PER_YEAR = 365.0
+
+XIRR_TOLERANCE = 1e-10
+XIRR_MAX_ITERATIONS = 100
+
+
+def build_cash_flow_series(investments: Iterable, prices: PriceHistory) -> Dict[str, list]:
+    """Value the holdings at the end of every event day, with the day's net cash flow.
+
+    Takes transactions sorted by purchase date. Buys are flows into the
+    portfolio (positive) and sells flows out of it (negative). Holdings are
+    marked at their close as of the day, or at the symbol's last transaction
+    price. Returns plain lists of day ordinals, values and flows, so the
+    series can be cached and sliced for any date range.
+    """
+    # Holdings, values and flows are summed in integer units
+    holdings: Dict[str, int] = {}
+    last_prices: Dict[str, float] = {}
+    series = {"days": [], "values": [], "flows": []}
+
+    for day, trades, _ in iter_events(investments, prices):
+        flow = 0
+        for inv in trades:
+            amount = to_units(inv.amount)
+            holdings[inv.symbol] = holdings.get(inv.symbol, 0) + amount
+            last_prices[inv.symbol] = inv.purchase_price
+            flow += value_units(amount, to_units(inv.purchase_price))
+
+        value = sum(
+            value_units(amount, to_units(prices.close_as_of(symbol, day) or last_prices[symbol]))
+            for symbol, amount in holdings.items()
+            if amount > 0
+        )
+        series["days"].append(day.toordinal())
+        series["values"].append(from_units(value))
+        series["flows"].append(from_units(flow))
+
+    return series
+
+
+def time_weighted_return(start_value: float, values: Sequence[float], flows: Sequence[float]) -> Optional[float]:
+    """Chain the growth of the sub-periods between consecutive event days.
+
+    A sub-period's growth is (V_i - F_i) / V_(i-1), with the day's flow taken
+    at its end; sub-periods starting from an empty portfolio are skipped.
+    Returns None when the portfolio is never held across a sub-period.
+    """
+    if np is not None:
+        values = np.asarray(values, dtype=float)
+        previous = np.r_[start_value, values[:-1]]
+        held = previous > 0
+        if not held.any():
+            return None
+        return float(np.prod((values[held] - np.asarray(flows, dtype=float)[held]) / previous[held]) - 1)
+
+    growth = []
+    previous = start_value
+    for value, flow in zip(values, flows):
+        if previous > 0:
+            growth.append((value - flow) / previous)
+        previous = value
+    return math.prod(growth) - 1 if growth else None
+
+
+def _npv(rate: float, years: Sequence[float], flows: Sequence[float]) -> float:
+    try:
+        return sum(flow * math.exp(-year * math.log1p(rate)) for year, flow in zip(years, flows))
+    except OverflowError:
+        return math.inf
+
+
+def _npv_derivative(rate: float, years: Sequence[float], flows: Sequence[float]) -> float:
+    try:
+        return sum(-year * flow * math.exp(-(year + 1) * math.log1p(rate)) for year, flow in zip(years, flows))
+    except OverflowError:
+        return math.inf
+
+
+def xirr(days: Sequence[int], flows: Sequence[float]) -> Optional[float]:
+    """Solve the annual rate at which dated cash flows have zero net present value.
+
+    Flows are from the investor's side (contributions negative). Newton's
+    method starts at 10%; when it diverges or leaves (-100%, inf), the rate
+    is bisected on a bracketing interval instead. Returns None when the
+    flows never change sign or all fall on one day, as no rate solves them.
+    """
+    if not (any(flow < 0 for flow in flows) and any(flow > 0 for flow in flows)):
+        return None
+    if min(days) == max(days):
+        return None
+
+    years = [(day - days[0]) / DAYS_PER_YEAR for day in days]
+
+    rate = 0.1
+    for _ in range(XIRR_MAX_ITERATIONS):
+        derivative = _npv_derivative(rate, years, flows)
+        if not derivative or not math.isfinite(derivative):
+            break
+        next_rate = rate - _npv(rate, years, flows) / derivative
+        if not math.isfinite(next_rate) or next_rate <= -1:
+            break
+        if abs(next_rate - rate) < XIRR_TOLERANCE:
+            return next_rate
+        rate = next_rate
+
+    low, high = -0.999999, 1.0
+    while _npv(low, years, flows) * _npv(high, years, flows) > 0:
+        high *= 10
+        if high > 1e9:
+            return None
+
+    low_value = _npv(low, years, flows)
+    for _ in range(XIRR_MAX_ITERATIONS * 2):
+        middle = (low + high) / 2
+        middle_value = _npv(middle, years, flows)
+        if (middle_value < 0) == (low_value < 0):
+            low, low_value = middle, middle_value
+        else:
+            high = middle
+        if high - low < XIRR_TOLERANCE:
+            break
+    return (low + high) / 2
+
+
+def compute_returns(
+    series: Dict[str, list],
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None
+) -> dict:
+    """Compute TWR and XIRR over a date range of a cash-flow series.
+
+    The value held before the range counts as a contribution on its first
+    day, and the value at its end as a final withdrawal.
+    """
+    days, values, flows = series["days"], series["values"], series["flows"]
+    lo = bisect_left(days, start_date.toordinal()) if start_date else 0
+    hi = bisect_right(days, end_date.toordinal()) if end_date else len(days)
+
+    start_value = values[lo - 1] if lo > 0 else 0.0
+    end_value = values[hi - 1] if hi > 0 else 0.0
+    window_days, window_values, window_flows = days[lo:hi], values[lo:hi], flows[lo:hi]
+
+    first_day = start_date.toordinal() if start_date else (window_days[0] if window_days else None)
+    last_day = end_date.toordinal() if end_date else (window_days[-1] if window_days else None)
+    net_cash_flow = sum(window_flows)
+
+    cash_flows: List[float] = []
+    cash_flow_days: List[int] = []
+    if start_value and first_day is not None:
+        cash_flow_days.append(first_day)
+        cash_flows.append(-start_value)
+    cash_flow_days.extend(window_days)
+    cash_flows.extend(-flow for flow in window_flows)
+    if end_value and last_day is not None:
+        cash_flow_days.append(last_day)
+        cash_flows.append(end_value)
+
+    twr = time_weighted_return(start_value, window_values, window_flows) if window_days else None
+    money_weighted = xirr(cash_flow_days, cash_flows) if cash_flows else None
+
+    return {
+        "start_date": date.fromordinal(first_day) if first_day is not None else None,
+        "end_date": date.fromordinal(last_day) if last_day is not None else None,
+        "start_value": round(start_value, 2),
+        "end_value": round(end_value, 2),
+        "net_cash_flow": round(net_cash_flow, 2),
+        "profit_loss": round(end_value - start_value - net_cash_flow, 2),
+        "twr": round(twr, 6) if twr is not None else None,
+        "xirr": round(money_weighted, 6) if money_weighted is not None else None
+    }
@@ -0,0 +1,322 @@
+"""Maintenance and roll-up of the persisted daily portfolio snapshots.
+
+A write refreshes the snapshot series it belongs to right away. New closes
+also change the series of every other user holding the symbol; those are
+only marked stale from the close's day (see `SnapshotRefresh`), so a write
+never replays other users' histories. A stale series is rolled up with its
+stale days replayed on read, until `refresh_stale_snapshots` rewrites it.
+"""
+from collections import defaultdict
+from datetime import date
+from itertools import groupby
+from operator import attrgetter
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import Date, Numeric, case, func, insert, literal, select
+from sqlalchemy.orm import Session
+
+from app.models.investment import Investment, InvestmentType
+from app.models.snapshot import PortfolioSnapshot, SnapshotRefresh
+from app.models.types import DECIMAL_PLACES
+from app.services.earnings import RunningPortfolio, fill_periods, iter_events, make_point
+from app.services.periods import bucket_function, format_bucket, get_bucket, get_period_bounds
+from app.services.prices import UPSERT_DIALECTS, load_price_history
+from app.services.units import from_units, to_units
+
+
+def load_carried_positions(
+    db: Session,
+    user_id: Optional[int],
+    investment_type: InvestmentType,
+    since: date
+) -> List[Tuple[str, int, int]]:
+    """Get (symbol, net amount, bought value) in units of positions held before `since`.
+
+    Summed in SQL, so a refresh does not load the transactions it does not
+    rewrite. Each buy's value is rounded to `DECIMAL_PLACES` before summing,
+    like `RunningPortfolio.apply` does.
+    """
+    bought_value = case(
+        (Investment.amount > 0, func.round(Investment.amount * Investment.purchase_price, DECIMAL_PLACES)),
+        else_=0
+    )
+    rows = db.query(
+        Investment.symbol,
+        func.sum(Investment.amount, type_=Numeric()),
+        func.sum(bought_value, type_=Numeric())
+    ).filter(
+        Investment.user_id == user_id,
+        Investment.investment_type == investment_type,
+        Investment.purchase_date < since
+    ).group_by(Investment.symbol).all()
+
+    return [(symbol, to_units(net_amount), to_units(total_bought_value)) for symbol, net_amount, total_bought_value in rows]
+
+
+def replay_snapshots(
+    db: Session,
+    user_id: Optional[int],
+    investment_type: InvestmentType,
+    since: date
+) -> List[dict]:
+    """Compute the snapshot rows of one (user, investment type) from `since` onward.
+
+    The positions carried into `since` are summed in SQL, and only the
+    transactions from `since` onward are loaded and replayed, so the cost
+    follows what is recomputed rather than the whole history. A row is
+    computed for every day with a transaction or a close of an open position.
+    """
+    carried = load_carried_positions(db, user_id, investment_type, since) if since > date.min else []
+    investments = db.query(Investment).filter(
+        Investment.user_id == user_id,
+        Investment.investment_type == investment_type,
+        Investment.purchase_date >= since
+    ).order_by(Investment.purchase_date, Investment.id).all()
+
+    carried_symbols = {symbol for symbol, _, _ in carried}
+    prices = load_price_history(db, carried_symbols | {inv.symbol for inv in investments})
+    portfolio = RunningPortfolio(prices)
+    rows = []
+
+    for symbol, net_amount, total_bought_value in carried:
+        portfolio.carry(symbol, net_amount, total_bought_value)
+
+    for day, transactions, priced in iter_events(investments, prices, carried_symbols, since):
+        if not transactions and not portfolio.holds(priced):
+            continue
+
+        for inv in transactions:
+            portfolio.apply(inv)
+        portfolio.reprice(priced)
+        portfolio.refresh(day)
+        rows.append({
+            "user_id": user_id,
+            "investment_type": investment_type,
+            "day": day,
+            "invested": portfolio.invested,
+            "current_value": portfolio.current_value,
+            "count": portfolio.count,
+            "total_amount": portfolio.total_amount
+        })
+
+    return rows
+
+
+def refresh_snapshots(
+    db: Session,
+    user_id: Optional[int],
+    investment_type: InvestmentType,
+    since: date
+) -> None:
+    """Recompute the snapshots of one (user, investment type) from `since` onward.
+
+    Snapshots before `since` stay as they are. A pending stale mark of the
+    series is settled too, starting from its day when that is earlier.
+    Pending changes are flushed first so the replay sees them.
+    """
+    db.flush()
+
+    stale_since = pop_stale_since(db, user_id, investment_type)
+    if stale_since is not None:
+        since = min(since, stale_since)
+
+    rows = replay_snapshots(db, user_id, investment_type, since)
+
+    db.query(PortfolioSnapshot).filter(
+        PortfolioSnapshot.user_id == user_id,
+        PortfolioSnapshot.investment_type == investment_type,
+        PortfolioSnapshot.day >= since
+    ).delete(synchronize_session=False)
+
+    if rows:
+        db.execute(insert(PortfolioSnapshot), rows)
+
+
+def mark_stale(db: Session, since_by_symbol: Dict[str, date]) -> None:
+    """Mark the series of every user who traded one of the symbols stale from its day.
+
+    One INSERT ... SELECT per distinct day, however many users hold the
+    symbols; an existing mark keeps the earlier day.
+    """
+    if not since_by_symbol:
+        return
+
+    db.flush()
+    insert_stale = UPSERT_DIALECTS[db.get_bind().dialect.name]
+    symbols_by_day = defaultdict(list)
+    for symbol, day in since_by_symbol.items():
+        symbols_by_day[day].append(symbol)
+
+    for day, symbols in symbols_by_day.items():
+        holders = select(
+            Investment.user_id,
+            Investment.investment_type,
+            literal(day, Date)
+        ).where(Investment.symbol.in_(symbols)).distinct()
+
+        statement = insert_stale(SnapshotRefresh).from_select(["user_id", "investment_type", "since"], holders)
+        db.execute(statement.on_conflict_do_update(
+            index_elements=[SnapshotRefresh.user_id, SnapshotRefresh.investment_type],
+            set_={"since": case(
+                (statement.excluded.since < SnapshotRefresh.since, statement.excluded.since),
+                else_=SnapshotRefresh.since
+            )}
+        ))
+
+
+def pop_stale_since(db: Session, user_id: Optional[int], investment_type: InvestmentType) -> Optional[date]:
+    """Remove the stale mark of a series and return its day, if it has one."""
+    filters = (SnapshotRefresh.user_id == user_id, SnapshotRefresh.investment_type == investment_type)
+
+    since = db.query(func.min(SnapshotRefresh.since)).filter(*filters).scalar()
+    if since is not None:
+        db.query(SnapshotRefresh).filter(*filters).delete(synchronize_session=False)
+    return since
+
+
+def refresh_stale_snapshots(db: Session) -> int:
+    """Rewrite every series marked stale. Returns the number of series refreshed."""
+    series = db.query(
+        SnapshotRefresh.user_id,
+        SnapshotRefresh.investment_type,
+        func.min(SnapshotRefresh.since)
+    ).group_by(SnapshotRefresh.user_id, SnapshotRefresh.investment_type).all()
+
+    for user_id, investment_type, since in series:
+        refresh_snapshots(db, user_id, investment_type, since)
+
+    return len(series)
+
+
+def rebuild_snapshots(db: Session, user_id: Optional[int] = None) -> int:
+    """Regenerate snapshots from the raw transaction log.
+
+    Rebuilds every user when `user_id` is not given. Returns the number of
+    (user, investment type) series written.
+    """
+    snapshots = db.query(PortfolioSnapshot)
+    stale = db.query(SnapshotRefresh)
+    keys = db.query(Investment.user_id, Investment.investment_type).distinct()
+
+    if user_id is not None:
+        snapshots = snapshots.filter(PortfolioSnapshot.user_id == user_id)
+        stale = stale.filter(SnapshotRefresh.user_id == user_id)
+        keys = keys.filter(Investment.user_id == user_id)
+
+    snapshots.delete(synchronize_session=False)
+    stale.delete(synchronize_session=False)
+
+    series = keys.all()
+    for key_user_id, investment_type in series:
+        refresh_snapshots(db, key_user_id, investment_type, date.min)
+
+    return len(series)
+
+
+def read_earnings_series(
+    db: Session,
+    user_id: int,
+    investment_type: Optional[InvestmentType],
+    aggregate_by: str,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    fill: bool = False
+) -> List[dict]:
+    """Read a user's cumulative earnings series from the snapshots.
+
+    Each investment type contributes its latest snapshot at or before the end
+    of a period, so a period is reported with the state after its last
+    transaction. Only the periods that contain a snapshot are emitted, unless
+    `fill` asks for every period of the range. Series marked stale are read
+    up to their stale day and replayed from it.
+    """
+    filters = [PortfolioSnapshot.user_id == user_id]
+    stale_filters = [SnapshotRefresh.user_id == user_id]
+    if investment_type:
+        filters.append(PortfolioSnapshot.investment_type == investment_type)
+        stale_filters.append(SnapshotRefresh.investment_type == investment_type)
+
+    range_filters = list(filters)
+    snapshots = []
+
+    if start_date:
+        range_start = get_period_bounds(start_date, aggregate_by)[0]
+        range_filters.append(PortfolioSnapshot.day >= range_start)
+
+        # State of each investment type carried into the range
+        carried = db.query(
+            PortfolioSnapshot.investment_type,
+            func.max(PortfolioSnapshot.day).label("day")
+        ).filter(
+            *filters,
+            PortfolioSnapshot.day < range_start
+        ).group_by(PortfolioSnapshot.investment_type).subquery()
+
+        snapshots.extend(db.query(PortfolioSnapshot).join(
+            carried,
+            (PortfolioSnapshot.investment_type == carried.c.investment_type)
+            & (PortfolioSnapshot.day == carried.c.day)
+        ).filter(*filters).all())
+
+    range_end = get_period_bounds(end_date, aggregate_by)[1] if end_date else date.max
+    if end_date:
+        range_filters.append(PortfolioSnapshot.day <= range_end)
+
+    snapshots.extend(
+        db.query(PortfolioSnapshot).filter(*range_filters).order_by(PortfolioSnapshot.day).all()
+    )
+
+    stale = dict(db.query(
+        SnapshotRefresh.investment_type,
+        func.min(SnapshotRefresh.since)
+    ).filter(*stale_filters).group_by(SnapshotRefresh.investment_type).all())
+
+    if stale:
+        snapshots = [snapshot for snapshot in snapshots if snapshot.day < stale.get(snapshot.investment_type, date.max)]
+
+        for stale_type, since in stale.items():
+            # The last snapshot before the stale days carries into them
+            snapshots.extend(db.query(PortfolioSnapshot).filter(
+                *filters,
+                PortfolioSnapshot.investment_type == stale_type,
+                PortfolioSnapshot.day < since,
+                PortfolioSnapshot.day <= range_end
+            ).order_by(PortfolioSnapshot.day.desc()).limit(1).all())
+            snapshots.extend(
+                PortfolioSnapshot(**row)
+                for row in replay_snapshots(db, user_id, stale_type, since)
+                if row["day"] <= range_end
+            )
+
+        snapshots.sort(key=attrgetter("day"))
+
+    start_bucket = get_bucket(start_date, aggregate_by) if start_date else None
+    bucket_of = bucket_function(aggregate_by)
+    latest: Dict[InvestmentType, PortfolioSnapshot] = {}
+    result = []
+
+    for bucket, period_snapshots in groupby(snapshots, key=lambda snapshot: bucket_of(snapshot.day)):
+        for snapshot in period_snapshots:
+            latest[snapshot.investment_type] = snapshot
+
+        # Periods before the range only carry state in, which filling needs
+        if start_bucket is not None and bucket < start_bucket and not fill:
+            continue
+
+        period_key = format_bucket(bucket, aggregate_by)
+        count = sum(snapshot.count for snapshot in latest.values())
+        if count:
+            # Summed in integer units across types, like the replay
+            result.append((bucket, make_point(
+                period_key,
+                from_units(sum(to_units(snapshot.invested) for snapshot in latest.values())),
+                from_units(sum(to_units(snapshot.current_value) for snapshot in latest.values())),
+                count,
+                from_units(sum(to_units(snapshot.total_amount) for snapshot in latest.values()))
+            )))
+        else:
+            result.append((bucket, make_point(period_key, 0, 0, 0, 0)))
+
+    if fill:
+        return fill_periods(result, aggregate_by, start_date, end_date)
+    return [point for _, point in result]
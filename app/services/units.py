@@ -0,0 +1,34 @@
+"""Integer fixed-point arithmetic for the analytics engines.
+
+Quantities, prices and money are stored with `DECIMAL_PLACES` decimals, so
+they convert exactly to integer units of 10**-DECIMAL_PLACES. Sums of units
+are exact, unlike repeated float additions, and are converted back to a
+float once, when a result is reported.
+"""
+from app.models.types import DECIMAL_PLACES
+
+SCALE = 10 ** DECIMAL_PLACES
+
+
+def to_units(value: float) -> int:
+    """Convert a quantity, price or amount of money to integer units."""
+    return round(value * SCALE)
+
+
+def from_units(units: int) -> float:
+    """Convert integer units back to a float."""
+    return units / SCALE
+
+
+def value_units(amount: int, price: int) -> int:
+    """Get the value of an amount at a price, both in units, in units (rounded half up)."""
+    return (amount * price + SCALE // 2) // SCALE
+
+
+def prorate_units(value: int, part: int, whole: int) -> int:
+    """Get the share of `value` that `part` of `whole` accounts for, all in units (rounded half up).
+
+    Values part of a position at its average price without dividing the
+    price out first, e.g. the cost of a sold amount at the average buy price.
+    """
+    return (value * part + whole // 2) // whole
@@ -0,0 +1,85 @@
+"""Benchmark the NumPy earnings kernel against the pure-Python replay.
+
+Builds a random history of buys and sells with closes spread over the
+period, checks that both engines produce the same series and reports the
+fastest run of each, for daily and monthly periods.
+
+Usage:
+    python -m scripts.bench_kernel [--transactions N] [--symbols N] [--days N] [--closes N] [--repeat N]
+"""
+import argparse
+import random
+import time
+from datetime import date, timedelta
+from types import SimpleNamespace
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from app.models.investment import InvestmentType
+from app.services import earnings, kernel
+from app.services.earnings import PriceHistory
+
+
+def make_history(transactions: int, symbols: int, days: int, closes: int, seed: int = 0) -> Tuple[List, PriceHistory]:
+    """Generate transactions sorted by date, and `closes` closes per symbol."""
+    rng = random.Random(seed)
+    start = date(2000, 1, 1)
+    types = list(InvestmentType)
+    held = [0] * symbols
+    investments = []
+
+    for id in range(transactions):
+        slot = rng.randrange(symbols)
+        amount = rng.choice([1, 2, 5]) if held[slot] < 2 or rng.random() < 0.7 else -1
+        held[slot] += amount
+        investments.append(SimpleNamespace(
+            id=id, name=f"S{slot}", symbol=f"S{slot}", investment_type=types[slot % len(types)],
+            amount=amount, purchase_price=round(rng.uniform(10, 500), 2),
+            purchase_date=start + timedelta(days=rng.randrange(days))
+        ))
+    investments.sort(key=lambda inv: (inv.purchase_date, inv.id))
+
+    prices = PriceHistory([
+        (f"S{slot}", start + timedelta(days=offset), round(rng.uniform(10, 500), 2))
+        for slot in range(symbols)
+        for offset in rng.sample(range(days), min(closes, days))
+    ])
+    return investments, prices
+
+
+def best_of(run: Callable[[], list], repeat: int) -> Tuple[float, list]:
+    """Get the fastest of `repeat` runs in seconds, and the series it produced."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        series = run()
+        best = min(best, time.perf_counter() - started)
+    return best, series
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--transactions", type=int, default=50000)
+    parser.add_argument("--symbols", type=int, default=300)
+    parser.add_argument("--days", type=int, default=12000, help="days the history spans")
+    parser.add_argument("--closes", type=int, default=40, help="closes per symbol")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per engine, the fastest is reported")
+    args = parser.parse_args(argv)
+
+    if not kernel.enabled():
+        parser.error("the NumPy kernel is not available (install numpy, set ANALYTICS_KERNEL=numpy)")
+
+    investments, prices = make_history(args.transactions, args.symbols, args.days, args.closes)
+
+    for aggregate_by in ("day", "month"):
+        python, expected = best_of(
+            lambda: earnings.build_earnings_series(investments, aggregate_by, prices=prices), args.repeat
+        )
+        numpy, actual = best_of(
+            lambda: kernel.build_earnings_series(investments, aggregate_by, prices=prices), args.repeat
+        )
+        assert actual == expected, "the engines produce different series"
+        print(f"{aggregate_by}: {len(expected)} periods, python {python:.3f} s, numpy {numpy:.3f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,45 +1,87 @@
+import os
+
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.pool import StaticPool
 
 from app.main import app
-from app.database import Base, get_db
+from app.database import Base, get_db, get_read_db, get_read_sessionmaker
+from app.services.cache import analytics_cache
 
 # Create in-memory SQLite database for testing
-SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+SQLALCHEMY_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
+
+# Postgres database for the tests of Postgres-only paths; they are skipped without it
+POSTGRES_URL = os.environ.get("TEST_POSTGRES_URL")
 
-engine = create_engine(
+# (symbol, investment_type, amount, price, current_price, day) of the shared test portfolio
+TRANSACTIONS = [
+    ("AAPL", "stocks", 10, 150.00, 175.50, "2024-01-10"),
+    ("BTC", "crypto", 0.5, 40000.00, 60000.00, "2024-01-20"),
+    ("AAPL", "stocks", 5, 160.00, 180.00, "2024-02-05"),
+    ("AAPL", "stocks", -8, 170.00, None, "2024-03-01"),
+    ("BTC", "crypto", -0.5, 65000.00, None, "2024-04-15"),
+    ("GLD", "gold", 3, 185.25, None, "2024-04-16"),
+    ("AAPL", "stocks", -7, 190.00, None, "2025-01-03"),
+]
+
+engine = create_async_engine(
     SQLALCHEMY_DATABASE_URL,
     connect_args={"check_same_thread": False},
     poolclass=StaticPool,
 )
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+TestingSessionLocal = async_sessionmaker(
+    bind=engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
 
 
-def override_get_db():
+async def override_get_db():
     """Override database dependency for testing."""
-    try:
-        db = TestingSessionLocal()
+    async with TestingSessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 
-@pytest.fixture(scope="function")
-def test_db():
-    """Create a fresh database for each test."""
-    Base.metadata.create_all(bind=engine)
-    yield
-    Base.metadata.drop_all(bind=engine)
+async def create_tables():
+    """Create all tables in the test database."""
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
 
 
 @pytest.fixture(scope="function")
-def client(test_db):
-    """Create a test client with database dependency override."""
+def client():
+    """Create a test client with a fresh database and database dependency override.
+
+    The database lives on the client's event loop; disposing the engine at the
+    end of the test drops the in-memory database with its connection.
+    """
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
+    app.dependency_overrides[get_read_sessionmaker] = lambda: TestingSessionLocal
     with TestClient(app) as test_client:
+        test_client.portal.call(create_tables)
+        test_client.portal.call(analytics_cache.reset)
         yield test_client
+        test_client.portal.call(engine.dispose)
     app.dependency_overrides.clear()
 
+
+@pytest.fixture
+def portfolio(client):
+    """Create a small portfolio with buys and sells across several months."""
+    for symbol, investment_type, amount, price, current_price, day in TRANSACTIONS:
+        response = client.post("/api/investments/", json={
+            "user_id": 1,
+            "name": symbol,
+            "symbol": symbol,
+            "investment_type": investment_type,
+            "amount": amount,
+            "purchase_price": price,
+            "current_price": current_price,
+            "purchase_date": day,
+        })
+        assert response.status_code == 201
+    return client
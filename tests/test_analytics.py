@@ -0,0 +1,536 @@
+"""Tests for investment analytics endpoints."""
+
+import random
+import re
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import event, select
+from sqlalchemy.dialects import sqlite
+
+from app.models.investment import Investment
+from app.models.position import Position
+from app.models.snapshot import SnapshotRefresh
+from app.services.cache import analytics_cache
+from app.services.earnings import PriceHistory
+from app.services.snapshots import rebuild_snapshots, refresh_stale_snapshots
+from app.services.portfolio import position_totals_query
+from app.services.positions import rebuild_positions
+from tests.conftest import TestingSessionLocal, engine
+
+# Indexes of the investments table by name
+INVESTMENT_INDEXES = {index.name: index for index in Investment.__table__.indexes}
+
+
+def test_earnings_by_month(portfolio):
+    """Test cumulative earnings aggregated by month."""
+    response = portfolio.get("/api/investments/analytics/earnings", params={
+        "user_id": 1,
+        "aggregate_by": "month",
+    })
+    assert response.status_code == 200
+    assert response.json() == [
+        {"date": "2024-01", "invested": 21500.0, "current_value": 31755.0,
+         "profit_loss": 10255.0, "count": 2, "total_amount": 10.5},
+        {"date": "2024-02", "invested": 22300.0, "current_value": 32700.0,
+         "profit_loss": 10400.0, "count": 2, "total_amount": 15.5},
+        {"date": "2024-03", "invested": 22300.0, "current_value": 31260.0,
+         "profit_loss": 8960.0, "count": 2, "total_amount": 7.5},
+        {"date": "2024-04", "invested": 2855.75, "current_value": 1815.75,
+         "profit_loss": -1040.0, "count": 2, "total_amount": 10.0},
+        {"date": "2025-01", "invested": 555.75, "current_value": 555.75,
+         "profit_loss": 0.0, "count": 1, "total_amount": 3.0},
+    ]
+
+
+def test_earnings_date_range_carries_earlier_positions(portfolio):
+    """Test that transactions before start_date still feed the first period."""
+    response = portfolio.get("/api/investments/analytics/earnings", params={
+        "user_id": 1,
+        "aggregate_by": "month",
+        "start_date": "2024-03-01",
+        "end_date": "2024-04-30",
+    })
+    assert response.status_code == 200
+    data = response.json()
+    assert [point["date"] for point in data] == ["2024-03", "2024-04"]
+    assert data[0]["invested"] == 22300.0
+    assert data[0]["count"] == 2
+
+
+def test_earnings_empty(client):
+    """Test earnings for a user without transactions."""
+    response = client.get("/api/investments/analytics/earnings", params={"user_id": 42})
+    assert response.status_code == 200
+    assert response.json() == []
+
+
+def test_earnings_snapshots_match_replay(portfolio):
+    """Test that the per-user snapshot roll-up matches replaying the transactions."""
+    for aggregate_by in ("day", "week", "month", "year"):
+        params = {"aggregate_by": aggregate_by}
+        from_snapshots = portfolio.get(
+            "/api/investments/analytics/earnings", params={**params, "user_id": 1}
+        ).json()
+        replayed = portfolio.get("/api/investments/analytics/earnings", params=params).json()
+        assert from_snapshots == replayed
+
+
+def post_random_history(client, seed: int, count: int = 60):
+    """Post a random multi-type history of user 1 with half-cent prices."""
+    rng = random.Random(seed)
+    symbols = {"AAPL": "stocks", "MSFT": "stocks", "BTC": "crypto", "ETH": "crypto", "GLD": "gold"}
+    held = dict.fromkeys(symbols, 0)
+    day = date(2024, 1, 2)
+
+    for _ in range(count):
+        symbol = rng.choice(list(symbols))
+        day += timedelta(days=rng.randint(0, 4))
+        if held[symbol] > 1 and rng.random() < 0.3:
+            amount = -rng.randint(1, int(held[symbol]))
+        else:
+            amount = rng.randint(1, 9)
+        held[symbol] += amount
+        response = client.post("/api/investments/", json={
+            "user_id": 1, "name": symbol, "symbol": symbol, "investment_type": symbols[symbol],
+            "amount": amount, "purchase_price": round(rng.uniform(10, 500), 2) + 0.005,
+            "current_price": round(rng.uniform(10, 500), 2) + 0.005, "purchase_date": day.isoformat(),
+        })
+        assert response.status_code == 201
+
+
+@pytest.mark.parametrize("seed", [0, 1])
+def test_earnings_snapshots_match_replay_across_types(client, seed):
+    """Test that rolling up several types' snapshots adds up to the replay to the cent."""
+    post_random_history(client, seed)
+
+    for aggregate_by in ("day", "week", "month"):
+        params = {"aggregate_by": aggregate_by}
+        from_snapshots = client.get("/api/investments/analytics/earnings", params={**params, "user_id": 1}).json()
+        assert from_snapshots == client.get("/api/investments/analytics/earnings", params=params).json()
+
+
+def test_earnings_snapshots_follow_writes(portfolio):
+    """Test that editing and deleting an old transaction rewrites later snapshots."""
+    investments = portfolio.get("/api/investments/", params={"user_id": 1}).json()
+    first_buy = next(inv for inv in investments if inv["purchase_date"] == "2024-01-10")
+
+    response = portfolio.put(f"/api/investments/{first_buy['id']}", json={"amount": 20})
+    assert response.status_code == 200
+    data = portfolio.get("/api/investments/analytics/earnings", params={"user_id": 1}).json()
+    assert data[0]["invested"] == 23000.0
+    assert data[-1]["total_amount"] == 13.0
+
+    response = portfolio.delete(f"/api/investments/{first_buy['id']}")
+    assert response.status_code == 204
+    data = portfolio.get("/api/investments/analytics/earnings", params={"user_id": 1}).json()
+    assert data[0] == {"date": "2024-01", "invested": 20000.0, "current_value": 30000.0,
+                       "profit_loss": 10000.0, "count": 1, "total_amount": 0.5}
+    assert data[-1]["count"] == 1
+
+
+def test_refreshed_snapshots_match_rebuild(portfolio):
+    """Test that a refresh from a mid-history day matches rebuilding the whole series."""
+    portfolio.post("/api/investments/", json={
+        "user_id": 1, "name": "AAPL", "symbol": "AAPL", "investment_type": "stocks",
+        "amount": 2, "purchase_price": 165.0, "current_price": 172.0, "purchase_date": "2024-02-20",
+    })
+    params = {"user_id": 1, "aggregate_by": "day"}
+    refreshed = portfolio.get("/api/investments/analytics/earnings", params=params).json()
+
+    async def rebuild():
+        async with TestingSessionLocal() as db:
+            await db.run_sync(rebuild_snapshots, 1)
+            await db.commit()
+
+    portfolio.portal.call(rebuild)
+    portfolio.portal.call(analytics_cache.reset)
+    assert portfolio.get("/api/investments/analytics/earnings", params=params).json() == refreshed
+
+
+def test_overview(portfolio):
+    """Test overview of open positions with realized profit from sales."""
+    portfolio.post("/api/investments/", json={
+        "user_id": 1, "name": "Ethereum", "symbol": "ETH", "investment_type": "crypto",
+        "amount": 2, "purchase_price": 3000.00, "current_price": 3500.00, "purchase_date": "2024-05-01",
+    })
+    portfolio.post("/api/investments/", json={
+        "user_id": 1, "name": "Ethereum", "symbol": "ETH", "investment_type": "crypto",
+        "amount": 1, "purchase_price": 2500.00, "purchase_date": "2024-05-02",
+    })
+
+    response = portfolio.get("/api/investments/analytics/overview", params={"user_id": 1})
+    assert response.status_code == 200
+    assert response.json() == {
+        "total_investments": 2,
+        "total_invested": 9055.75,
+        "total_current_value": 11055.75,
+        "unrealized_profit_loss": 2000.0,
+        "realized_profit_loss": 12890.0,
+        "total_profit_loss": 14890.0,
+        "profit_loss_percentage": 164.43,
+        "by_type": {
+            "gold": {"count": 1, "invested": 555.75, "current_value": 555.75, "profit_loss": 0.0},
+            "crypto": {"count": 1, "invested": 8500.0, "current_value": 10500.0, "profit_loss": 2000.0},
+        },
+    }
+
+
+def test_available_positions(portfolio):
+    """Test that only open positions are offered for sale."""
+    response = portfolio.get("/api/investments/analytics/available-positions", params={"user_id": 1})
+    assert response.status_code == 200
+    assert response.json() == [{
+        "symbol": "GLD",
+        "name": "GLD",
+        "investment_type": "gold",
+        "available_amount": 3.0,
+        "average_purchase_price": 185.25,
+        "current_price": 185.25,
+        "total_invested": 555.75,
+        "total_current_value": 555.75,
+        "unrealized_profit_loss": 0.0,
+    }]
+
+
+def test_positions_ledger_follows_writes(portfolio):
+    """Test that the ledger moves with edited and deleted transactions."""
+    investments = portfolio.get("/api/investments/", params={"user_id": 1}).json()
+    gold = next(inv for inv in investments if inv["symbol"] == "GLD")
+
+    response = portfolio.put(f"/api/investments/{gold['id']}", json={"symbol": "XAU", "current_price": 200.0})
+    assert response.status_code == 200
+    positions = portfolio.get("/api/investments/analytics/available-positions", params={"user_id": 1}).json()
+    assert [(pos["symbol"], pos["current_price"]) for pos in positions] == [("XAU", 200.0)]
+
+    response = portfolio.delete(f"/api/investments/{gold['id']}")
+    assert response.status_code == 204
+    overview = portfolio.get("/api/investments/analytics/overview", params={"user_id": 1}).json()
+    assert overview["total_investments"] == 0
+    assert overview["realized_profit_loss"] == 12890.0
+
+
+def test_rebuild_positions_matches_ledger(portfolio):
+    """Test that rebuilding from the transaction log reproduces the maintained ledger."""
+    async def ledger(db):
+        return [
+            (p.user_id, p.symbol, p.name, p.investment_type, p.bought_amount, p.sold_amount,
+             p.total_bought_value, p.total_sold_value)
+            for p in await db.scalars(select(Position).order_by(Position.symbol))
+        ]
+
+    async def rebuild_and_compare():
+        async with TestingSessionLocal() as db:
+            maintained = await ledger(db)
+            assert await db.run_sync(rebuild_positions) == 3
+            await db.commit()
+            db.expunge_all()
+            assert await ledger(db) == maintained
+
+    portfolio.portal.call(rebuild_and_compare)
+
+
+def assert_dashboard_matches(client, params: dict):
+    """Assert that every part of the dashboard matches its standalone endpoint."""
+    ranged = {key: params[key] for key in ("user_id", "start_date", "end_date") if key in params}
+    response = client.get("/api/investments/analytics/dashboard", params={**params, "recent_limit": 3})
+    assert response.status_code == 200
+    data = response.json()
+
+    assert data["overview"] == client.get(
+        "/api/investments/analytics/overview", params={"user_id": params["user_id"]}
+    ).json()
+    assert data["earnings"] == client.get(
+        "/api/investments/analytics/earnings", params=params
+    ).json()
+    assert data["available_positions"] == client.get(
+        "/api/investments/analytics/available-positions", params={"user_id": params["user_id"]}
+    ).json()
+    assert data["recent_investments"] == client.get(
+        "/api/investments/", params={**ranged, "limit": 3}
+    ).json()
+
+
+def test_dashboard_matches_separate_endpoints(portfolio):
+    """Test that every part of the dashboard matches its standalone endpoint."""
+    assert_dashboard_matches(portfolio, {"user_id": 1, "aggregate_by": "week"})
+
+
+def test_dashboard_matches_separate_endpoints_across_types(client):
+    """Test the dashboard on a multi-type history with half-cent prices, before and after a bulk update."""
+    post_random_history(client, 0)
+    assert_dashboard_matches(client, {"user_id": 1, "aggregate_by": "day"})
+
+    response = client.post("/api/investments/prices/bulk", json={"prices": [
+        {"symbol": "AAPL", "price": 201.125}, {"symbol": "BTC", "price": 333.335}, {"symbol": "GLD", "price": 187.005},
+    ]})
+    assert response.status_code == 200
+    for aggregate_by in ("day", "month"):
+        assert_dashboard_matches(client, {
+            "user_id": 1, "aggregate_by": aggregate_by, "start_date": "2024-02-01", "end_date": "2024-03-31",
+        })
+
+
+def test_current_price_is_shared_per_symbol(portfolio):
+    """Test that a price entered with any transaction revalues every holder of the symbol."""
+    response = portfolio.post("/api/investments/", json={
+        "user_id": 2, "name": "Gold", "symbol": "GLD", "investment_type": "gold",
+        "amount": 1, "purchase_price": 190.00, "current_price": 200.00, "purchase_date": "2024-06-01",
+    })
+    assert response.status_code == 201
+
+    positions = portfolio.get("/api/investments/analytics/available-positions", params={"user_id": 1}).json()
+    assert [(pos["symbol"], pos["current_price"], pos["total_current_value"]) for pos in positions] == [
+        ("GLD", 200.0, 600.0)
+    ]
+    overview = portfolio.get("/api/investments/analytics/overview", params={"user_id": 1}).json()
+    assert overview["total_current_value"] == 600.0
+
+
+def test_entered_price_marks_other_holders_stale(portfolio):
+    """Test that a price entered by one user marks the other holders' series instead of replaying them."""
+    response = portfolio.post("/api/investments/", json={
+        "user_id": 2, "name": "Gold", "symbol": "GLD", "investment_type": "gold",
+        "amount": 1, "purchase_price": 190.00, "current_price": 200.00, "purchase_date": "2024-06-01",
+    })
+    assert response.status_code == 201
+
+    async def stale_series():
+        async with TestingSessionLocal() as db:
+            return (await db.execute(select(SnapshotRefresh.user_id, SnapshotRefresh.since))).all()
+
+    async def refresh():
+        async with TestingSessionLocal() as db:
+            await db.run_sync(refresh_stale_snapshots)
+            await db.commit()
+
+    assert portfolio.portal.call(stale_series) == [(1, date(2024, 6, 1))]
+
+    params = {"user_id": 1, "aggregate_by": "day"}
+    marked = portfolio.get("/api/investments/analytics/earnings", params=params).json()
+    # 7 AAPL at the 180.00 close and 3 GLD at the new close
+    assert next(point for point in marked if point["date"] == "2024-06-01")["current_value"] == 1860.0
+
+    portfolio.portal.call(refresh)
+    portfolio.portal.call(analytics_cache.reset)
+    assert portfolio.portal.call(stale_series) == []
+    assert portfolio.get("/api/investments/analytics/earnings", params=params).json() == marked
+
+
+def test_stale_series_respects_the_date_range(portfolio):
+    """Test that a series marked stale by new closes still ends at end_date."""
+    portfolio.post("/api/investments/prices/bulk", json={"prices": [{"symbol": "AAPL", "price": 200.00}]})
+
+    params = {"aggregate_by": "month", "start_date": "2024-01-01", "end_date": "2024-04-30"}
+    data = portfolio.get("/api/investments/analytics/earnings", params={**params, "user_id": 1}).json()
+    assert [point["date"] for point in data] == ["2024-01", "2024-02", "2024-03", "2024-04"]
+    assert data == portfolio.get("/api/investments/analytics/earnings", params=params).json()
+
+
+def test_entered_price_keeps_a_loaded_close(portfolio):
+    """Test that a price entered with a transaction does not replace a quoted close of that day."""
+    portfolio.post("/api/investments/prices/bulk", json={"prices": [{"symbol": "GLD", "price": 200.00}]})
+    portfolio.post("/api/investments/", json={
+        "user_id": 2, "name": "Gold", "symbol": "GLD", "investment_type": "gold",
+        "amount": 1, "purchase_price": 190.00, "current_price": 250.00, "purchase_date": date.today().isoformat(),
+    })
+
+    data = portfolio.get("/api/investments/analytics/earnings", params={"user_id": 1, "aggregate_by": "day"}).json()
+    assert data[-1]["current_value"] == 600.0
+
+
+def test_bulk_price_update_revalues_positions(portfolio):
+    """Test that a bulk price update counts changes and refreshes cached analytics."""
+    before = portfolio.get("/api/investments/analytics/overview", params={"user_id": 1}).json()
+    assert before["total_current_value"] == 555.75
+
+    response = portfolio.post("/api/investments/prices/bulk", json={"prices": [
+        {"symbol": "AAPL", "price": 180.00},
+        {"symbol": "GLD", "price": 190.00},
+        {"symbol": "GLD", "price": 200.00},
+        {"symbol": "MSFT", "price": 400.00},
+    ]})
+    assert response.status_code == 200
+    assert response.json() == {"symbols": 3, "changed": 2}
+
+    after = portfolio.get("/api/investments/analytics/overview", params={"user_id": 1}).json()
+    assert after["total_current_value"] == 600.0
+
+
+def test_price_history_returns_the_close_as_of_a_day():
+    """Test that a day between closes is valued at the latest earlier close."""
+    prices = PriceHistory([
+        ("AAPL", date(2024, 3, 1), 170.0),
+        ("AAPL", date(2024, 1, 10), 175.5),
+        ("GLD", date(2024, 4, 16), 185.25),
+    ])
+    assert prices.close_as_of("AAPL", date(2024, 1, 9)) is None
+    assert prices.close_as_of("AAPL", date(2024, 2, 1)) == 175.5
+    assert prices.close_as_of("AAPL", date(2024, 3, 1)) == 170.0
+    assert prices.close_as_of("MSFT", date(2024, 3, 1)) is None
+    assert prices.days("AAPL", since=date(2024, 2, 1)) == [date(2024, 3, 1)]
+
+
+def test_new_closes_add_mark_to_market_points(portfolio):
+    """Test that a close of a held symbol adds an earnings point valued at it."""
+    portfolio.post("/api/investments/prices/bulk", json={"prices": [{"symbol": "GLD", "price": 200.00}]})
+
+    for params in ({"user_id": 1}, {}):
+        data = portfolio.get(
+            "/api/investments/analytics/earnings", params={**params, "aggregate_by": "day"}
+        ).json()
+        assert data[-1] == {"date": date.today().isoformat(), "invested": 555.75, "current_value": 600.0,
+                            "profit_loss": 44.25, "count": 1, "total_amount": 3.0}
+
+
+def test_earnings_fill_carries_positions_through_gaps(portfolio):
+    """Test that a filled series has every period and repeats the state through gaps."""
+    today = date.today()
+    data = portfolio.get("/api/investments/analytics/earnings", params={
+        "user_id": 1, "aggregate_by": "month", "fill": True,
+    }).json()
+    # Without an end date the series runs to the current period
+    assert len(data) == (today.year - 2024) * 12 + today.month
+    assert data[0]["date"] == "2024-01" and data[-1] == {**data[12], "date": today.strftime("%Y-%m")}
+    assert data[5] == {**data[3], "date": "2024-06"}
+
+    ranged = portfolio.get("/api/investments/analytics/earnings", params={
+        "user_id": 1, "aggregate_by": "week", "fill": True, "start_date": "2023-12-25", "end_date": "2024-06-30",
+    }).json()
+    assert ranged[0] == {"date": "2023-W52", "invested": 0, "current_value": 0,
+                         "profit_loss": 0, "count": 0, "total_amount": 0}
+    assert ranged[-1] == {**ranged[-10], "date": "2024-W26"}
+
+    for params in ({"start_date": "2024-06-01", "end_date": "2024-08-31"}, {}):
+        for aggregate_by in ("month", "day"):
+            params = {**params, "aggregate_by": aggregate_by, "fill": True}
+            from_snapshots = portfolio.get(
+                "/api/investments/analytics/earnings", params={**params, "user_id": 1}
+            ).json()
+            replayed = portfolio.get("/api/investments/analytics/earnings", params=params).json()
+            assert from_snapshots == replayed
+    assert [point["date"] for point in from_snapshots][:2] == ["2024-01-10", "2024-01-11"]
+    assert len(from_snapshots) == (today - date(2024, 1, 10)).days + 1
+
+    # A range starting after the last transaction carries its positions forward
+    for params in ({"user_id": 1}, {}):
+        after = portfolio.get("/api/investments/analytics/earnings", params={
+            **params, "aggregate_by": "month", "fill": True, "start_date": "2025-03-01",
+        }).json()
+        assert after[0] == {**data[12], "date": "2025-03"}
+        assert after[-1]["date"] == today.strftime("%Y-%m")
+
+
+def test_sold_out_position_leaves_no_residue(client):
+    """Test that selling every fractional buy closes the position exactly."""
+    for amount in (0.1, 0.1, 0.1, -0.3):
+        response = client.post("/api/investments/", json={
+            "user_id": 1,
+            "name": "Bitcoin",
+            "symbol": "BTC",
+            "investment_type": "crypto",
+            "amount": amount,
+            "purchase_price": 0.7,
+            "purchase_date": "2024-01-10",
+        })
+        assert response.status_code == 201
+
+    overview = client.get("/api/investments/analytics/overview", params={"user_id": 1}).json()
+    assert overview["total_investments"] == 0
+    assert client.get("/api/investments/analytics/available-positions", params={"user_id": 1}).json() == []
+
+    dashboard = client.get("/api/investments/analytics/dashboard", params={"user_id": 1}).json()
+    assert dashboard["overview"]["total_investments"] == 0
+    assert dashboard["available_positions"] == []
+    assert [point["count"] for point in dashboard["earnings"]] == [0]
+
+    earnings = client.get("/api/investments/analytics/earnings").json()
+    assert [(point["count"], point["invested"]) for point in earnings] == [(0, 0)]
+
+
+def explain_queries(client, path, params):
+    """Run a request and get the query plan of every statement it reads investments or positions with."""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().startswith("SELECT") and ("investments" in statement or "positions" in statement):
+            statements.append((statement, parameters))
+
+    event.listen(engine.sync_engine, "before_cursor_execute", capture)
+    try:
+        assert client.get(path, params=params).status_code == 200
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", capture)
+
+    async def explain():
+        async with engine.connect() as conn:
+            return [
+                (statement, [row[3] for row in await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)])
+                for statement, parameters in statements
+            ]
+
+    return client.portal.call(explain)
+
+
+def explain_statement(client, statement):
+    """Get the query plan of a statement, compiled with its parameters inline."""
+    sql = str(statement.compile(dialect=sqlite.dialect(), compile_kwargs={"literal_binds": True}))
+
+    async def explain():
+        async with engine.connect() as conn:
+            return [row[3] for row in await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}")]
+
+    return sql, client.portal.call(explain)
+
+
+def index_covers(index_name, statement):
+    """Check that an index holds every investments column a statement uses.
+
+    SQLite has no INCLUDE columns, so the index keys are counted together
+    with its PostgreSQL INCLUDE list, which makes an index-only scan
+    possible there.
+    """
+    index = INVESTMENT_INDEXES[index_name]
+    covered = {column.name for column in index.columns} | set(index.dialect_options["postgresql"]["include"])
+    return set(re.findall(r"investments\.(\w+)", statement)) <= covered
+
+
+def assert_served_by_covering_index(statement, plan):
+    """Check that the plan reads investments through one index holding every column it uses."""
+    assert not any(re.fullmatch(r"SCAN investments", line) for line in plan), plan
+
+    [index_name] = [
+        match.group(1) for line in plan
+        if (match := re.match(r"(?:SCAN|SEARCH) investments USING (?:COVERING )?INDEX (\w+)", line))
+    ]
+    assert index_covers(index_name, statement), (index_name, statement)
+
+
+@pytest.mark.parametrize("path", ["/api/investments/analytics/overview", "/api/investments/analytics/available-positions"])
+def test_position_queries_are_served_by_indexes(portfolio, path):
+    """Test that the position queries read the ledger and never the transactions."""
+    for params in ({"user_id": 1}, {}):
+        for statement, plan in explain_queries(portfolio, path, params):
+            assert not any(re.search(r"\binvestments\b", line) for line in plan), plan
+
+            if params:
+                # A single user's positions are read from the ledger by (user_id, symbol)
+                assert "SEARCH positions USING INDEX ix_positions_user_symbol (user_id=?)" in plan
+            else:
+                # Every user's positions: one pass over the ledger rows
+                assert any(line.startswith("SCAN positions") for line in plan), plan
+
+
+def test_position_recompute_and_holder_lookup_are_served_by_indexes(portfolio):
+    """Test the queries writes run: one position's aggregate and the holders of a symbol."""
+    statement, plan = explain_statement(
+        portfolio, position_totals_query(Investment.user_id == 1, Investment.symbol == "AAPL")
+    )
+    assert_served_by_covering_index(statement, plan)
+    # A planner may search one position by (user_id, symbol) instead
+    assert index_covers("ix_investments_user_symbol_date_id", statement)
+
+    assert_served_by_covering_index(*explain_statement(
+        portfolio,
+        select(Investment.user_id, Investment.investment_type).where(Investment.symbol.in_(["AAPL"])).distinct()
+    ))
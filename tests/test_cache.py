@@ -0,0 +1,69 @@
+"""Tests for the analytics response cache."""
+
+import asyncio
+
+from app.services.cache import AnalyticsCache, MemoryCache
+
+
+def test_memory_cache_evicts_least_recently_used_and_expired():
+    """Test LRU eviction beyond the size limit and expiry after the TTL."""
+    async def scenario():
+        cache = MemoryCache(max_entries=2)
+        await cache.set("a", 1, ttl=60)
+        await cache.set("b", 2, ttl=60)
+        assert await cache.get("a") == 1
+        await cache.set("c", 3, ttl=60)
+        assert await cache.get("b") is None
+        assert await cache.get("a") == 1
+
+        await cache.set("d", 4, ttl=0)
+        assert await cache.get("d") is None
+
+    asyncio.run(scenario())
+
+
+def test_misses_after_a_write_are_computed_from_the_primary():
+    """Test that a recompute right after a write never reads a lagging replica."""
+    async def scenario():
+        cache = AnalyticsCache(MemoryCache(max_entries=16), ttl=60, primary_window=60)
+        sources = []
+
+        async def compute(from_primary):
+            sources.append(from_primary)
+            return len(sources)
+
+        await cache.get_or_compute("overview", 1, {}, compute)
+        await cache.invalidate(1)
+        await cache.get_or_compute("overview", 1, {}, compute)
+        await cache.get_or_compute("overview", None, {}, compute)
+        await cache.get_or_compute("overview", 2, {}, compute)
+        await cache.invalidate_prices()
+        await cache.get_or_compute("overview", 2, {}, compute)
+        assert sources == [False, True, True, False, True]
+
+        await cache.backend.set_flag("prices", ttl=0)
+        await cache.backend.set_flag("2", ttl=0)
+        await cache.backend.bump_version("2")
+        await cache.get_or_compute("overview", 2, {}, compute)
+        assert sources[-1] is False
+
+    asyncio.run(scenario())
+
+
+def test_analytics_are_cached_until_a_write(client):
+    """Test that repeated reads hit the cache and writes invalidate it."""
+    params = {"user_id": 1}
+    assert client.get("/api/investments/analytics/overview", params=params).json()["total_investments"] == 0
+    assert client.get("/api/investments/analytics/overview", params=params).json()["total_investments"] == 0
+    assert client.get("/api/investments/analytics/cache-stats").json()["hits"] == 1
+
+    response = client.post("/api/investments/", json={
+        "user_id": 1, "name": "Apple", "symbol": "AAPL", "investment_type": "stocks",
+        "amount": 10, "purchase_price": 150.00, "purchase_date": "2024-01-10",
+    })
+    assert response.status_code == 201
+
+    assert client.get("/api/investments/analytics/overview", params=params).json()["total_investments"] == 1
+    assert client.get("/api/investments/analytics/overview").json()["total_investments"] == 1
+    stats = client.get("/api/investments/analytics/cache-stats").json()
+    assert (stats["hits"], stats["misses"]) == (1, 3)
@@ -0,0 +1,26 @@
+"""Tests for database engine configuration."""
+
+from app.database import get_async_database_url, get_engine_options
+
+
+def test_engine_options_set_statement_timeout_per_driver(monkeypatch):
+    """Test that the Postgres statement timeout is passed in each driver's form."""
+    from app.config import settings
+    monkeypatch.setattr(settings, "db_statement_timeout", 5000)
+
+    sync_options = get_engine_options("postgresql://postgres:postgres@db:5432/investments_dash")
+    assert sync_options["pool_size"] == settings.db_pool_size
+    assert sync_options["connect_args"] == {"options": "-c statement_timeout=5000"}
+
+    async_url = get_async_database_url("postgresql://postgres:postgres@db:5432/investments_dash")
+    assert async_url.startswith("postgresql+asyncpg://")
+    assert get_engine_options(async_url)["connect_args"] == {
+        "server_settings": {"statement_timeout": "5000"}
+    }
+
+
+def test_engine_options_sqlite_skip_pool_sizing():
+    """Test that SQLite engines only get the pre-ping and echo options."""
+    options = get_engine_options("sqlite+aiosqlite:///:memory:")
+    assert "pool_size" not in options
+    assert "connect_args" not in options
@@ -0,0 +1,134 @@
+"""Tests for bulk transaction import."""
+
+import asyncio
+import json
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.database import Base, get_async_database_url
+from app.models.investment import Investment
+from app.services.importer import insert_batch, validate_record
+from tests.conftest import POSTGRES_URL, TRANSACTIONS
+
+
+def test_import_csv_reports_bad_rows_and_keeps_the_rest(client):
+    """Test that invalid rows are reported by line while valid rows are imported."""
+    body = "\n".join([
+        "symbol,name,investment_type,amount,purchase_price,current_price,purchase_date",
+        "AAPL,Apple,stocks,10,150,175.5,2024-01-10",
+        "BTC,Bitcoin,crypto,0.5,-1,,2024-01-20",
+        "GLD,Gold,gold,3,185.25,,",
+        "AAPL,Apple,stocks,5,160,180",
+        "ETH,Ethereum,crypto,2,3000,,2024-05-01",
+    ])
+    response = client.post(
+        "/api/investments/import",
+        params={"user_id": 1, "chunk_size": 1},
+        content=body,
+        headers={"Content-Type": "text/csv"},
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert (data["imported"], data["failed"]) == (2, 3)
+    assert [(error["line"], error["errors"][0]["field"]) for error in data["errors"]] == [
+        (3, "purchase_price"), (4, "purchase_date"), (5, None),
+    ]
+
+    positions = client.get("/api/investments/analytics/available-positions", params={"user_id": 1}).json()
+    assert [pos["symbol"] for pos in positions] == ["AAPL", "ETH"]
+
+
+def test_import_ndjson_matches_single_creates(client):
+    """Test that an imported history yields the same analytics as one-by-one creates."""
+    rows = [
+        {"user_id": 2, "name": symbol, "symbol": symbol, "investment_type": investment_type,
+         "amount": amount, "purchase_price": price, "current_price": current_price, "purchase_date": day}
+        for symbol, investment_type, amount, price, current_price, day in TRANSACTIONS
+    ]
+    response = client.post(
+        "/api/investments/import",
+        params={"format": "ndjson"},
+        content="\n".join(json.dumps(row) for row in rows) + "\nnot json\n",
+    )
+    assert response.status_code == 200
+    assert response.json()["imported"] == len(TRANSACTIONS)
+    assert response.json()["errors"][0]["line"] == len(TRANSACTIONS) + 1
+
+    for row in rows:
+        client.post("/api/investments/", json={**row, "user_id": 3})
+
+    for endpoint in ("overview", "earnings", "available-positions"):
+        imported = client.get(f"/api/investments/analytics/{endpoint}", params={"user_id": 2}).json()
+        created = client.get(f"/api/investments/analytics/{endpoint}", params={"user_id": 3}).json()
+        assert imported == created
+
+
+def test_import_rejects_unknown_format(client):
+    """Test that a body without a known format is refused."""
+    response = client.post("/api/investments/import", content="{}", headers={"Content-Type": "text/plain"})
+    assert response.status_code == 415
+
+
+def test_export_round_trips_through_import(portfolio):
+    """Test that an exported history imports back into the same analytics."""
+    client = portfolio
+
+    for format in ("csv", "ndjson"):
+        response = client.get("/api/investments/export", params={"user_id": 1, "format": format})
+        assert response.status_code == 200
+        assert response.headers["content-disposition"] == f'attachment; filename="investments.{format}"'
+
+        user_id = 2 if format == "csv" else 3
+        response = client.post(
+            "/api/investments/import",
+            params={"user_id": user_id, "format": format},
+            content=response.content,
+        )
+        assert response.json() == {"imported": len(TRANSACTIONS), "failed": 0, "errors": []}
+
+        exported = client.get("/api/investments/analytics/earnings", params={"user_id": 1}).json()
+        imported = client.get("/api/investments/analytics/earnings", params={"user_id": user_id}).json()
+        assert imported == exported
+
+
+@pytest.mark.skipif(not POSTGRES_URL, reason="TEST_POSTGRES_URL is not set")
+def test_insert_batch_copies_rows_on_postgres():
+    """Test the COPY path of a batch insert on asyncpg.
+
+    Runs against the database in TEST_POSTGRES_URL, whose tables it drops.
+    """
+    engine = create_async_engine(get_async_database_url(POSTGRES_URL))
+    investments = [
+        validate_record({
+            "user_id": 1, "name": symbol, "symbol": symbol, "investment_type": investment_type,
+            "amount": amount, "purchase_price": price, "current_price": current_price, "purchase_date": day,
+        })[0]
+        for symbol, investment_type, amount, price, current_price, day in TRANSACTIONS
+    ]
+
+    async def scenario():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+            await conn.run_sync(Base.metadata.create_all)
+
+        try:
+            async with AsyncSession(engine, expire_on_commit=False) as db:
+                assert db.get_bind().dialect.driver == "asyncpg"
+                await insert_batch(db, investments)
+                await db.commit()
+                return (await db.scalars(select(Investment).order_by(Investment.id))).all()
+        finally:
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.drop_all)
+            await engine.dispose()
+
+    rows = asyncio.run(scenario())
+
+    assert [
+        (inv.symbol, inv.investment_type.value, inv.amount, inv.purchase_price, inv.current_price,
+         inv.purchase_date.isoformat())
+        for inv in rows
+    ] == TRANSACTIONS
+    assert all(inv.user_id == 1 and inv.created_at is not None for inv in rows)
@@ -87,6 +87,33 @@ def test_get_investment_not_found(client):
     assert response.status_code == 404
 
 
+def test_investment_lookup_scoped_to_user(client):
+    """Test that get, update and delete by ID honor an optional user_id."""
+    create_response = client.post("/api/investments/", json={
+        "user_id": 1,
+        "name": "Apple Inc.",
+        "symbol": "AAPL",
+        "investment_type": "stocks",
+        "amount": 10,
+        "purchase_price": 150.00,
+        "purchase_date": "2024-01-10",
+    })
+    investment_id = create_response.json()["id"]
+    
+    assert client.get(f"/api/investments/{investment_id}", params={"user_id": 1}).status_code == 200
+    assert client.get(f"/api/investments/{investment_id}", params={"user_id": 2}).status_code == 404
+    
+    response = client.put(f"/api/investments/{investment_id}", params={"user_id": 2}, json={"current_price": 180.00})
+    assert response.status_code == 404
+    response = client.put(f"/api/investments/{investment_id}", params={"user_id": 1}, json={"current_price": 180.00})
+    assert response.status_code == 200
+    assert response.json()["current_price"] == 180.00
+    
+    assert client.delete(f"/api/investments/{investment_id}", params={"user_id": 2}).status_code == 404
+    assert client.delete(f"/api/investments/{investment_id}", params={"user_id": 1}).status_code == 204
+    assert client.get(f"/api/investments/{investment_id}").status_code == 404
+
+
 def test_update_investment(client):
     """Test updating an investment."""
     # Create test investment
@@ -168,3 +195,56 @@ def test_investment_validation(client):
     response = client.post("/api/investments/", json=invalid_data)
     assert response.status_code == 422
 
+
+
+def test_get_investments_cursor_pagination(client):
+    """Test walking the history with keyset cursors."""
+    for day in ["2024-01-01", "2024-01-02", "2024-01-02", "2024-01-03", "2024-01-04"]:
+        client.post("/api/investments/", json={
+            "user_id": 1,
+            "name": "Apple Inc.",
+            "symbol": "AAPL",
+            "investment_type": "stocks",
+            "amount": 1,
+            "purchase_price": 150.00,
+            "purchase_date": day,
+        })
+    expected = [inv["id"] for inv in client.get("/api/investments/", params={"user_id": 1}).json()]
+    assert len(expected) == 5
+
+    seen = []
+    params = {"user_id": 1, "limit": 2}
+    while True:
+        response = client.get("/api/investments/", params=params)
+        assert response.status_code == 200
+        seen.extend(inv["id"] for inv in response.json())
+        if "X-Next-Cursor" not in response.headers:
+            break
+        params["cursor"] = response.headers["X-Next-Cursor"]
+    assert seen == expected
+
+    # Offset paging keeps working for old clients
+    response = client.get("/api/investments/", params={"user_id": 1, "skip": 2, "limit": 2})
+    assert [inv["id"] for inv in response.json()] == expected[2:4]
+
+    response = client.get("/api/investments/", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+
+
+def test_get_investments_matches_validated_response(client):
+    """Test the list rows are serialized like a validated InvestmentResponse."""
+    created = client.post("/api/investments/", json={
+        "user_id": 1,
+        "name": "Apple Inc.",
+        "symbol": "AAPL",
+        "investment_type": "stocks",
+        "amount": 10,
+        "purchase_price": 150.00,
+        "current_price": 175.50,
+        "purchase_date": "2024-01-01",
+    }).json()
+
+    response = client.get("/api/investments/", params={"user_id": 1})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    assert response.json() == [client.get(f"/api/investments/{created['id']}").json()]
@@ -0,0 +1,85 @@
+"""Tests for the NumPy analytics kernel against the pure-Python services."""
+
+import random
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from app.models.investment import InvestmentType
+from app.services import earnings, kernel
+from app.services.earnings import PriceHistory
+from app.services.periods import bucket_start, format_bucket, get_bucket
+from app.services.units import to_units, value_units
+
+np = pytest.importorskip("numpy")
+
+
+def make_history(seed: int):
+    """Generate a random trading history with closes for most symbols."""
+    rng = random.Random(seed)
+    symbols = {f"SYM{i}": rng.choice(list(InvestmentType)) for i in range(8)}
+    held = dict.fromkeys(symbols, 0.0)
+    investments = []
+    day = date(2023, 1, 1)
+
+    for id in range(300):
+        day += timedelta(days=rng.choice([0, 0, 1, 3, 10]))
+        symbol = rng.choice(list(symbols))
+        if held[symbol] > 0 and rng.random() < 0.3:
+            amount = -min(held[symbol], rng.choice([1, 2, 5]))
+        else:
+            amount = rng.choice([1, 2, 5, 0.5])
+        held[symbol] += amount
+        investments.append(SimpleNamespace(
+            id=id, name=symbol, symbol=symbol, investment_type=symbols[symbol],
+            amount=amount, purchase_price=round(rng.uniform(10, 500), 2), purchase_date=day
+        ))
+
+    closes = [
+        (symbol, date(2023, 1, 1) + timedelta(days=offset), round(rng.uniform(10, 500), 2))
+        for symbol in list(symbols)[:6]
+        for offset in rng.sample(range(0, day.toordinal() - date(2022, 12, 1).toordinal()), 40)
+    ]
+    return investments, PriceHistory(closes)
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_earnings_kernel_matches_replay(seed):
+    """Test that the vectorized replay matches the running-totals engine exactly."""
+    investments, prices = make_history(seed)
+
+    for aggregate_by in ("day", "week", "month", "year"):
+        for start_date, end_date in ((None, None), (date(2023, 3, 15), date(2023, 9, 1))):
+            for fill in (False, True):
+                assert kernel.build_earnings_series(
+                    investments, aggregate_by, start_date, end_date, prices, fill
+                ) == earnings.build_earnings_series(investments, aggregate_by, start_date, end_date, prices, fill)
+
+
+def test_value_units_is_exact_for_large_positions():
+    """Test that vectorized unit products round like `value_units` where float products would not."""
+    amounts = [to_units(value) for value in (0.5, 3, 123456.78901234, 9000000)]
+    prices = [to_units(value) for value in (10.05, 0.00000001, 98765.43210987, 1000.12345678)]
+
+    actual = kernel._value_units(np.array(amounts), np.array(prices))
+    assert actual.tolist() == [value_units(amount, price) for amount, price in zip(amounts, prices)]
+    assert actual[2] != int(np.rint(amounts[2] * (prices[2] / 1e8)))
+
+
+def test_period_buckets_match_labels():
+    """Test that the vectorized period ordinals and their labels match the calendar."""
+    days = [date(1969, 12, 31), date(1970, 1, 1), date(2020, 12, 28), date(2021, 1, 3), date(2024, 2, 29)]
+    days += [date(2000, 1, 1) + timedelta(days=offset) for offset in random.Random(1).sample(range(20000), 200)]
+    ordinals = np.array([day.toordinal() for day in days])
+
+    for aggregate_by in ("day", "week", "month", "year"):
+        buckets = kernel._buckets(ordinals, aggregate_by).tolist()
+        assert buckets == [get_bucket(day, aggregate_by) for day in days]
+        for day, bucket in zip(days, buckets):
+            assert bucket_start(bucket, aggregate_by) <= day
+            assert get_bucket(bucket_start(bucket, aggregate_by), aggregate_by) == bucket
+
+    year, week, _ = date(2021, 1, 3).isocalendar()
+    assert format_bucket(get_bucket(date(2021, 1, 3), "week"), "week") == f"{year}-W{week:02d}" == "2020-W53"
+    assert format_bucket(get_bucket(date(2024, 2, 29), "month"), "month") == "2024-02"
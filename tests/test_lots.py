@@ -0,0 +1,141 @@
+"""Tests for FIFO and LIFO lot matching."""
+
+from datetime import date
+
+import pytest
+
+from app.services.lots import LotBook
+from app.services.units import to_units
+
+TRANSACTIONS = [
+    ("AAPL", 10, 100.00, "2024-01-10"),
+    ("AAPL", 10, 200.00, "2024-02-10"),
+    ("AAPL", -15, 250.00, "2024-03-10"),
+    ("AAPL", 5, 300.00, "2024-04-10"),
+    ("AAPL", -4, 320.00, "2024-05-10"),
+]
+
+
+@pytest.fixture
+def lots(client):
+    """Create buys at rising prices with partial sells in between."""
+    for symbol, amount, price, day in TRANSACTIONS:
+        response = client.post("/api/investments/", json={
+            "user_id": 1,
+            "name": symbol,
+            "symbol": symbol,
+            "investment_type": "stocks",
+            "amount": amount,
+            "purchase_price": price,
+            "current_price": 350.00 if amount > 0 else None,
+            "purchase_date": day,
+        })
+        assert response.status_code == 201
+    return client
+
+
+def test_lot_book_matches_oldest_or_newest_lots_first():
+    """Test that a sell closes lots from the front (FIFO) or the back (LIFO)."""
+    fifo, lifo = LotBook("fifo"), LotBook("lifo")
+    for book in (fifo, lifo):
+        book.buy(1, date(2024, 1, 1), to_units(10), to_units(100.0))
+        book.buy(2, date(2024, 2, 1), to_units(10), to_units(200.0))
+        book.sell(to_units(15), to_units(250.0), to_units(20), to_units(3000.0))
+
+    assert (fifo.realized, fifo.open_cost) == (to_units(15 * 250 - 10 * 100 - 5 * 200), to_units(5 * 200))
+    assert (lifo.realized, lifo.open_cost) == (to_units(15 * 250 - 10 * 200 - 5 * 100), to_units(5 * 100))
+    assert [lot[3] for lot in fifo.lots] == [to_units(5)]
+    assert [lot[3] for lot in lifo.lots] == [to_units(5)]
+
+
+def test_lot_book_matches_fractional_lots_to_the_unit():
+    """Test that many fractional lots add up exactly instead of drifting like float sums."""
+    book = LotBook("fifo")
+    for id in range(10):
+        book.buy(id, date(2024, 1, 1), to_units(0.1), to_units(0.7))
+    book.sell(to_units(0.3), to_units(1.1), to_units(1), to_units(0.7))
+
+    assert book.open_cost == to_units(0.49)
+    assert book.realized == to_units(0.12)
+    assert sum(lot[3] for lot in book.lots) == to_units(0.7)
+
+
+@pytest.mark.parametrize("user_id", [1, None])
+def test_overview_cost_basis_methods(lots, user_id):
+    """Test realized and unrealized P/L under average cost, FIFO and LIFO."""
+    expected = {
+        # method: (realized, invested in the 6 open units)
+        # Average of all buys: 4500 / 25 = 180
+        "avg": (15 * 250 - 15 * 180 + 4 * 320 - 4 * 180, 6 * 180),
+        # FIFO: 10@100 + 5@200, then 4@200; open 1@200 + 5@300
+        "fifo": (15 * 250 - 2000 + 4 * 320 - 800, 1 * 200 + 5 * 300),
+        # LIFO: 10@200 + 5@100, then 4@300; open 5@100 + 1@300
+        "lifo": (15 * 250 - 2500 + 4 * 320 - 1200, 5 * 100 + 1 * 300),
+    }
+    for method, (realized, invested) in expected.items():
+        params = {"cost_basis_method": method, **({"user_id": user_id} if user_id else {})}
+        overview = lots.get("/api/investments/analytics/overview", params=params).json()
+        assert overview["realized_profit_loss"] == realized
+        assert overview["total_invested"] == invested
+        assert overview["unrealized_profit_loss"] == 6 * 350 - invested
+
+        positions = lots.get("/api/investments/analytics/available-positions", params=params).json()
+        if method != "avg":
+            assert positions[0]["total_invested"] == invested
+            assert positions[0]["average_purchase_price"] == round(invested / 6, 2)
+
+
+def test_back_dated_transactions_replay_lots(lots):
+    """Test that a sell dated before later buys and an edited buy rematch the lots."""
+    lots.post("/api/investments/sell", json={
+        "user_id": 1, "symbol": "AAPL", "amount": 6, "sale_price": 400.00, "sale_date": "2024-06-01",
+    })
+    overview = lots.get("/api/investments/analytics/overview", params={
+        "user_id": 1, "cost_basis_method": "fifo",
+    }).json()
+    assert overview["total_investments"] == 0
+    # Open 1@200 and 5@300 close at 400
+    assert overview["realized_profit_loss"] == 15 * 250 - 2000 + 4 * 320 - 800 + 6 * 400 - 1700
+
+    investments = lots.get("/api/investments/", params={"user_id": 1}).json()
+    first_buy = next(inv for inv in investments if inv["purchase_date"] == "2024-01-10")
+    lots.put(f"/api/investments/{first_buy['id']}", json={"purchase_date": "2024-03-20"})
+
+    # The first sell now finds only 10@200 open, the other 5 match the 200 average;
+    # the later sells close 4@100 and 6@100
+    overview = lots.get("/api/investments/analytics/overview", params={
+        "user_id": 1, "cost_basis_method": "fifo",
+    }).json()
+    assert overview["realized_profit_loss"] == (15 * 250 - 3000) + (4 * 320 - 400) + (6 * 400 - 600)
+
+
+def test_rebuild_positions_matches_maintained_lots(lots):
+    """Test that rebuilding lots from the transaction log reproduces the incremental ones."""
+    from sqlalchemy import select
+
+    from app.models.lot import Lot
+    from app.models.position import Position
+    from app.services.positions import rebuild_positions
+    from tests.conftest import TestingSessionLocal
+
+    async def state(db):
+        lots = [
+            (lot.investment_id, lot.opened_on, lot.price, lot.fifo_remaining, lot.lifo_remaining)
+            for lot in await db.scalars(select(Lot).order_by(Lot.investment_id))
+        ]
+        totals = [
+            (p.fifo_realized, p.fifo_open_cost, p.lifo_realized, p.lifo_open_cost)
+            for p in await db.scalars(select(Position))
+        ]
+        return lots, totals
+
+    async def rebuild_and_compare():
+        async with TestingSessionLocal() as db:
+            maintained = await state(db)
+            assert len(maintained[0]) == 3
+            await db.run_sync(rebuild_positions)
+            await db.commit()
+            db.expunge_all()
+            assert await state(db) == maintained
+
+    lots.portal.call(rebuild_and_compare)
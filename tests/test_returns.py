@@ -0,0 +1,70 @@
+"""Tests for time-weighted and money-weighted returns."""
+
+from datetime import date
+
+import pytest
+
+from app.services.returns import xirr
+
+TRANSACTIONS = [
+    ("AAPL", 10, 100.00, 100.00, "2024-01-01"),
+    ("AAPL", 10, 120.00, 120.00, "2024-07-01"),
+    ("GLD", 2, 50.00, None, "2024-07-01"),
+]
+
+
+@pytest.fixture
+def history(client):
+    """Create buys whose prices mark the holdings on each trade day."""
+    for symbol, amount, price, current_price, day in TRANSACTIONS:
+        response = client.post("/api/investments/", json={
+            "user_id": 1,
+            "name": symbol,
+            "symbol": symbol,
+            "investment_type": "stocks" if symbol == "AAPL" else "gold",
+            "amount": amount,
+            "purchase_price": price,
+            "current_price": current_price,
+            "purchase_date": day,
+        })
+        assert response.status_code == 201
+    return client
+
+
+def test_xirr_solves_known_rates():
+    """Test that XIRR recovers the rate of simple and multi-flow schedules."""
+    start = date(2023, 1, 1).toordinal()
+    assert xirr([start, start + 365], [-100.0, 110.0]) == pytest.approx(0.10)
+    assert xirr([start, start + 365, start + 730], [-100.0, -100.0, 231.0]) == pytest.approx(0.10)
+    assert xirr([start, start + 365], [-100.0, -10.0]) is None
+    assert xirr([start, start + 365], [-100.0, 50.0]) == pytest.approx(-0.5)
+    assert xirr([start, start + 30], [-100.0, 80.0]) == pytest.approx(0.8 ** (365 / 30) - 1)
+
+
+def test_returns_over_whole_history(history):
+    """Test TWR across a contribution and XIRR of the dated flows."""
+    data = history.get("/api/investments/analytics/returns", params={"user_id": 1}).json()
+    # AAPL grows 100 -> 120 before the second buy; GLD has no gain
+    assert data["twr"] == pytest.approx(0.2)
+    assert (data["start_value"], data["end_value"], data["net_cash_flow"]) == (0.0, 2500.0, 2300.0)
+    assert data["profit_loss"] == 200.0
+
+    years = (date(2024, 7, 1) - date(2024, 1, 1)).days / 365
+    assert data["xirr"] == pytest.approx(1.2 ** (1 / years) - 1, abs=1e-6)
+
+    gold = history.get("/api/investments/analytics/returns", params={"user_id": 1, "investment_type": "gold"}).json()
+    assert (gold["twr"], gold["xirr"]) == (None, None)
+
+
+def test_returns_range_reuses_cached_cash_flows(history):
+    """Test that a new date range carries the earlier value in without reloading."""
+    history.get("/api/investments/analytics/returns", params={"user_id": 1})
+    data = history.get("/api/investments/analytics/returns", params={
+        "user_id": 1, "start_date": "2024-06-01", "end_date": "2024-12-31",
+    }).json()
+    assert history.get("/api/investments/analytics/cache-stats").json()["hits"] == 1
+
+    assert (data["start_date"], data["end_date"]) == ("2024-06-01", "2024-12-31")
+    assert data["start_value"] == 1000.0
+    assert data["twr"] == pytest.approx(0.2)
+    assert data["xirr"] is not None
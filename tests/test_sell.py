@@ -0,0 +1,122 @@
+"""Tests for selling investments."""
+
+import asyncio
+
+import httpx
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.database import Base, get_async_database_url, get_db, get_read_db
+from app.main import app
+from app.models.investment import Investment
+from app.services.cache import analytics_cache
+from app.services.locks import position_lock
+from tests.conftest import POSTGRES_URL
+
+
+BUY = {
+    "user_id": 1,
+    "name": "Apple Inc.",
+    "symbol": "AAPL",
+    "investment_type": "stocks",
+    "amount": 10,
+    "purchase_price": 150.00,
+    "purchase_date": "2024-01-10",
+}
+
+
+def sell(amount):
+    return {"user_id": 1, "symbol": "AAPL", "amount": amount, "sale_price": 170.00, "sale_date": "2024-03-01"}
+
+
+def test_sell_validates_available_amount(client):
+    """Test that sells are limited to the amount still held."""
+    response = client.post("/api/investments/sell", json=sell(1))
+    assert response.status_code == 404
+
+    client.post("/api/investments/", json=BUY)
+    response = client.post("/api/investments/sell", json=sell(11))
+    assert response.status_code == 400
+
+    response = client.post("/api/investments/sell", json=sell(4))
+    assert response.status_code == 201
+    data = response.json()
+    assert data["amount"] == -4
+    assert (data["name"], data["investment_type"]) == ("Apple Inc.", "stocks")
+
+
+def run_concurrent_sells(database_url):
+    """Sell 3 of a 10 position from 8 parallel requests against a database.
+
+    Returns the status codes and the amount still held. Every request gets
+    its own session and connection from a fresh engine.
+    """
+    engine = create_async_engine(database_url)
+    session_factory = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def override_get_db():
+        async with session_factory() as db:
+            yield db
+
+    async def scenario():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+            await conn.run_sync(Base.metadata.create_all)
+        await analytics_cache.reset()
+
+        try:
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                response = await client.post("/api/investments/", json=BUY)
+                assert response.status_code == 201
+
+                responses = await asyncio.gather(*[
+                    client.post("/api/investments/sell", json=sell(3)) for _ in range(8)
+                ])
+
+            async with session_factory() as db:
+                held = await db.scalar(select(func.sum(Investment.amount)))
+        finally:
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.drop_all)
+            await engine.dispose()
+        return [response.status_code for response in responses], held
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
+    try:
+        return asyncio.run(scenario())
+    finally:
+        app.dependency_overrides.clear()
+
+
+def test_concurrent_sells_never_oversell(tmp_path):
+    """Test that parallel sells of one position cannot sell more than it holds.
+
+    Uses a file database so every request gets its own connection.
+    """
+    status_codes, held = run_concurrent_sells(f"sqlite+aiosqlite:///{tmp_path / 'sell.db'}")
+
+    assert sorted(status_codes) == [201] * 3 + [400] * 5
+    assert held == 1
+
+
+@pytest.mark.skipif(not POSTGRES_URL, reason="TEST_POSTGRES_URL is not set")
+def test_concurrent_sells_never_oversell_with_row_locks():
+    """Test that SELECT ... FOR UPDATE on the ledger serializes sells on Postgres.
+
+    Runs against the database in TEST_POSTGRES_URL, whose tables it drops.
+    """
+    status_codes, held = run_concurrent_sells(get_async_database_url(POSTGRES_URL))
+
+    assert sorted(status_codes) == [201] * 3 + [400] * 5
+    assert held == 1
+
+
+def test_position_locks_are_per_user():
+    """Test that sells of a symbol by different users do not share a lock."""
+    db = AsyncSession(bind=create_async_engine("sqlite+aiosqlite://"))
+
+    assert position_lock(db, 1, "AAPL") is position_lock(db, 1, "AAPL")
+    assert position_lock(db, 1, "AAPL") is not position_lock(db, 2, "AAPL")